@@ -0,0 +1,289 @@
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import and_, insert, not_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.finance_rollup import AppointmentChange, record_appointment_changes
+from app.core.money import from_cents
+from app.core.response_cache import bump_generation
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.availability_template import AvailabilityTemplate
+from app.models.tenant import Tenant
+from app.settings import settings
+
+# (start_at, end_at, price_cents)
+Slot = tuple[datetime, datetime, int]
+
+
+def day_slots(start_dt: datetime, end_dt: datetime, duration: timedelta, price_cents: int) -> list[Slot]:
+    """Slots consecutivos de `duration` que cabem inteiros em [start_dt, end_dt]."""
+    slots = []
+    cur = start_dt
+    while cur + duration <= end_dt:
+        slots.append((cur, cur + duration, price_cents))
+        cur += duration
+    return slots
+
+
+def _lock_tenant_agenda(db: Session, tenant_id: int) -> None:
+    # no Postgres serializa geradores concorrentes do mesmo tenant (API + job de horizonte)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:k1, :k2)"), {"k1": 22, "k2": tenant_id})
+
+
+def insert_missing_slots(db: Session, tenant_id: int, slots: list[Slot]) -> tuple[int, int]:
+    """Insere como `available` os slots que ainda não existem. Retorna (criados, pulados).
+
+    Na transação do chamador (commit por conta dele); atualiza o rollup junto.
+    """
+    if not slots:
+        return 0, 0
+
+    _lock_tenant_agenda(db, tenant_id)
+
+    # ✅ 1 SELECT para a janela inteira em vez de 1 por slot
+    window_start = min(s[0] for s in slots)
+    window_end = max(s[1] for s in slots)
+    existing = set(
+        db.execute(
+            select(Appointment.start_at, Appointment.end_at).where(
+                Appointment.tenant_id == tenant_id,
+                Appointment.start_at >= window_start,
+                Appointment.start_at < window_end,
+            )
+        ).tuples()
+    )
+
+    missing: dict[tuple[datetime, datetime], int] = {}
+    for start_at, end_at, price_cents in slots:
+        if (start_at, end_at) not in existing:
+            missing.setdefault((start_at, end_at), price_cents)
+
+    if missing:
+        # ✅ 1 INSERT multi-linha (executemany/insertmanyvalues)
+        db.execute(
+            insert(Appointment),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "start_at": start_at,
+                    "end_at": end_at,
+                    "status": "available",
+                    "price_cents": price_cents,
+                    "patient_user_id": None,
+                }
+                for (start_at, end_at), price_cents in missing.items()
+            ],
+        )
+        changes: list[AppointmentChange] = [
+            (start_at, price_cents, None, "available") for (start_at, _), price_cents in missing.items()
+        ]
+        record_appointment_changes(db, tenant_id, changes)
+
+    return len(missing), len(slots) - len(missing)
+
+
+def expand_templates(templates: list[AvailabilityTemplate], date_from: date, date_to: date) -> list[Slot]:
+    """Todos os slots dos templates entre date_from e date_to (inclusivo)."""
+    by_weekday: dict[int, list[AvailabilityTemplate]] = {}
+    for t in templates:
+        by_weekday.setdefault(t.weekday, []).append(t)
+
+    slots: list[Slot] = []
+    day = date_from
+    while day <= date_to:
+        for t in by_weekday.get(day.weekday(), ()):
+            slots += day_slots(
+                datetime.combine(day, t.start_time),
+                datetime.combine(day, t.end_time),
+                timedelta(minutes=t.duration_minutes),
+                t.price_cents,
+            )
+        day += timedelta(days=1)
+    return slots
+
+
+def templates_stmt(tenant_id: int):
+    return select(AvailabilityTemplate).where(
+        AvailabilityTemplate.tenant_id == tenant_id,
+        AvailabilityTemplate.is_active == True,
+    )
+
+
+def active_templates(db: Session, tenant_id: int) -> list[AvailabilityTemplate]:
+    return list(db.execute(templates_stmt(tenant_id)).scalars())
+
+
+def materialize(db: Session, tenant_id: int, date_from: date, date_to: date) -> tuple[int, int]:
+    """Expande os templates ativos no período. Idempotente: rodar de novo só pula."""
+    slots = expand_templates(active_templates(db, tenant_id), date_from, date_to)
+    return insert_missing_slots(db, tenant_id, slots)
+
+
+def roll_forward(horizon_days: int, today: date | None = None) -> dict[int, int]:
+    """Garante a agenda aberta de hoje até hoje + horizon_days para todo tenant ativo com template.
+
+    Uma transação por tenant. Retorna {tenant_id: criados}.
+    """
+    today = today or datetime.utcnow().date()
+    until = today + timedelta(days=horizon_days)
+
+    db = SessionLocal()
+    try:
+        tenant_ids = db.execute(
+            select(AvailabilityTemplate.tenant_id)
+            .join(Tenant, Tenant.id == AvailabilityTemplate.tenant_id)
+            .where(AvailabilityTemplate.is_active == True, Tenant.is_active == True)
+            .distinct()
+        ).scalars().all()
+
+        created = {}
+        for tenant_id in tenant_ids:
+            created[tenant_id], _ = materialize(db, tenant_id, today, until)
+            db.commit()
+            if created[tenant_id]:
+                bump_generation(db, tenant_id)
+        return created
+    finally:
+        db.close()
+
+
+# ============================
+# Modo virtual (AVAILABILITY_MODE=virtual)
+# ============================
+# Horários livres não viram linha: saem dos templates menos o que já está ocupado.
+# Só booked/done/no_show/canceled são gravados; o id do slot virtual é negativo e
+# codifica o início (minutos desde 1970), então o /book sabe qual horário reservar.
+
+VIRTUAL_EPOCH = datetime(1970, 1, 1)
+
+
+def virtual_mode() -> bool:
+    return settings.AVAILABILITY_MODE == "virtual"
+
+
+def virtual_id(start_at: datetime) -> int:
+    return -int((start_at - VIRTUAL_EPOCH) // timedelta(minutes=1))
+
+
+def virtual_start(appointment_id: int) -> datetime:
+    try:
+        return VIRTUAL_EPOCH + timedelta(minutes=-appointment_id)
+    except OverflowError:
+        raise HTTPException(status_code=404, detail="Consulta não encontrada")
+
+
+def blocking_stmt(tenant_id: int, start: datetime, end: datetime):
+    """Linhas que ocupam [start, end): tudo, menos consulta cancelada de paciente (essa libera o horário)."""
+    return select(Appointment.start_at, Appointment.end_at).where(
+        Appointment.tenant_id == tenant_id,
+        Appointment.start_at < end,
+        Appointment.end_at > start,
+        not_(and_(Appointment.status == "canceled", Appointment.patient_user_id.isnot(None))),
+    )
+
+
+def subtract_blocked(slots: list[Slot], blocked: list[tuple[datetime, datetime]]) -> list[Slot]:
+    """Remove os slots que se sobrepõem a algum intervalo ocupado. O((n + m) log m)."""
+    if not blocked:
+        return slots
+    blocked = sorted(blocked)
+    starts = [b[0] for b in blocked]
+    # maior end_at entre os bloqueios que começam até i (para sobreposição com intervalos longos)
+    max_end, cur = [], datetime.min
+    for _, e in blocked:
+        cur = max(cur, e)
+        max_end.append(cur)
+
+    free = []
+    for slot in slots:
+        i = bisect_left(starts, slot[1]) - 1  # último bloqueio que começa antes do fim do slot
+        if i < 0 or max_end[i] <= slot[0]:
+            free.append(slot)
+    return free
+
+
+def virtual_slots(
+    templates: list[AvailabilityTemplate],
+    blocked: list[tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime,
+) -> list[Slot]:
+    """Slots livres com início em [start, end)."""
+    expanded = [
+        s for s in expand_templates(templates, start.date(), end.date())
+        if start <= s[0] < end
+    ]
+    return subtract_blocked(sorted(expanded), blocked)
+
+
+def virtual_as_dict(slot: Slot) -> dict:
+    start_at, end_at, price_cents = slot
+    return {
+        "id": virtual_id(start_at),
+        "start_at": start_at,
+        "end_at": end_at,
+        "status": "available",
+        "price": from_cents(price_cents),
+        "patient_user_id": None,
+    }
+
+
+def list_virtual(db: Session, tenant_id: int, start: datetime, end: datetime) -> list[dict]:
+    templates = active_templates(db, tenant_id)
+    if not templates:
+        return []
+    blocked = list(db.execute(blocking_stmt(tenant_id, start, end)).tuples())
+    return [virtual_as_dict(s) for s in virtual_slots(templates, blocked, start, end)]
+
+
+def claim_virtual_slot(
+    db: Session,
+    tenant_id: int,
+    appointment_id: int,
+    status: str,
+    patient_user_id: int | None,
+) -> Appointment:
+    """Grava o slot virtual como linha real (`booked` no /book; `canceled` = bloqueio do admin).
+
+    Commita. A checagem de sobreposição roda sob o lock de agenda do tenant: uma reserva e
+    um bloqueio do admin no mesmo horário nunca passam os dois (o índice único parcial não
+    cobre `canceled` nem templates sobrepostos; fica só como segunda barreira).
+    """
+    start_at = virtual_start(appointment_id)
+    slot = next(
+        (s for s in expand_templates(active_templates(db, tenant_id), start_at.date(), start_at.date())
+         if s[0] == start_at),
+        None,
+    )
+    if slot is None:
+        raise HTTPException(status_code=404, detail="Consulta não encontrada")
+
+    # ✅ check-then-insert serializado com os outros claims e o materialize do mesmo tenant
+    _lock_tenant_agenda(db, tenant_id)
+    if db.execute(blocking_stmt(tenant_id, slot[0], slot[1]).limit(1)).first():
+        # mesmo código do /book materializado: horário já ocupado é conflito
+        raise HTTPException(status_code=409, detail="Horário indisponível")
+
+    appt = Appointment(
+        tenant_id=tenant_id,
+        start_at=slot[0],
+        end_at=slot[1],
+        status=status,
+        price_cents=slot[2],
+        patient_user_id=patient_user_id,
+    )
+    db.add(appt)
+    record_appointment_changes(db, tenant_id, [(appt.start_at, appt.price_cents, None, status)])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Horário acabou de ser reservado")
+    bump_generation(db, tenant_id)
+    db.refresh(appt)
+    return appt
@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.finance_rollup import record_appointment_changes
+from app.core.metrics import TimingStat
+from app.core.response_cache import bump_generation
+from app.models.appointment import Appointment
+
+
+class BookingStats:
+    """Contenção do /appointments/book, exposta em /platform/metrics."""
+
+    OUTCOMES = ("booked", "conflict", "past", "not_found", "error")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {o: 0 for o in self.OUTCOMES}
+        self.latency = TimingStat()
+
+    def record(self, outcome: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+        self.latency.observe(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        attempts = counts["booked"] + counts["conflict"]
+        return {
+            **counts,
+            "conflict_ratio": round(counts["conflict"] / attempts, 4) if attempts else 0.0,
+            "latency": self.latency.stats(),
+        }
+
+
+booking_stats = BookingStats()
+
+
+def book_slot(db: Session, tenant_id: int, appointment_id: int, patient_user_id: int) -> Appointment:
+    """Reserva o horário com um UPDATE condicional (commita).
+
+    A checagem "está livre e no futuro" é o próprio WHERE: duas requisições no mesmo
+    slot nunca passam juntas, e o caso feliz é 1 round-trip (UPDATE ... RETURNING).
+    """
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        now = datetime.utcnow()
+        try:
+            appt = db.execute(
+                update(Appointment)
+                .where(
+                    Appointment.id == appointment_id,
+                    Appointment.tenant_id == tenant_id,
+                    Appointment.status == "available",
+                    Appointment.start_at >= now,
+                )
+                .values(status="booked", patient_user_id=patient_user_id)
+                .returning(Appointment)
+                .execution_options(synchronize_session=False)
+            ).scalar_one_or_none()
+        except IntegrityError:
+            # índice único de horário ocupado: outra linha no mesmo início já está reservada
+            db.rollback()
+            outcome = "conflict"
+            raise HTTPException(status_code=409, detail="Horário acabou de ser reservado")
+
+        if appt is None:
+            db.rollback()
+            # só no caminho de erro: descobre o motivo para responder certo
+            row = db.execute(
+                select(Appointment.status, Appointment.start_at).where(
+                    Appointment.id == appointment_id,
+                    Appointment.tenant_id == tenant_id,
+                )
+            ).first()
+            if row is None:
+                outcome = "not_found"
+                raise HTTPException(status_code=404, detail="Consulta não encontrada")
+            if row.status == "available" and row.start_at < now:
+                outcome = "past"
+                raise HTTPException(status_code=400, detail="Não é possível agendar um horário no passado")
+            outcome = "conflict"
+            raise HTTPException(status_code=409, detail="Horário indisponível")
+
+        record_appointment_changes(db, tenant_id, [(appt.start_at, appt.price_cents, "available", "booked")])
+        # desanexa antes do commit: os campos que voltaram no RETURNING continuam válidos (sem SELECT extra)
+        db.expunge(appt)
+        db.commit()
+        outcome = "booked"
+        bump_generation(db, tenant_id)
+        return appt
+    finally:
+        booking_stats.record(outcome, time.perf_counter() - t0)
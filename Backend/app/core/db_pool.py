@@ -0,0 +1,83 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import TimingStat
+
+
+class _InstrumentedPoolMixin:
+    """Mede o tempo de espera no checkout e conta timeouts/pico de overflow."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = TimingStat()
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(time.perf_counter() - t0)
+
+        self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+        self.peak_overflow = max(self.peak_overflow, self.overflow())
+        return conn
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "max_overflow": self._max_overflow,
+            "peak_checked_out": self.peak_checked_out,
+            "peak_overflow": self.peak_overflow,
+            "timeouts": self.timeouts,
+            "checkout_wait": self.wait_time.stats(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def install_idle_validation(engine, interval: float) -> None:
+    """Alternativa ao pool_pre_ping: só faz o ping se a conexão ficou ociosa > interval."""
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        record.info["last_used"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        last_used = record.info.get("last_used")
+        if last_used is None or time.monotonic() - last_used < interval:
+            return
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            # o pool descarta esta conexão e tenta outra
+            raise exc.DisconnectionError()
+        finally:
+            cursor.close()
+
+
+def pool_stats(engine) -> dict | None:
+    if engine is None:
+        return None
+    pool = engine.pool
+    if isinstance(pool, _InstrumentedPoolMixin):
+        return pool.stats()
+    return {"status": pool.status()}
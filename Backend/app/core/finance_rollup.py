@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.finance_rollup import FinanceDailyRollup
+
+STATUSES = ("available", "booked", "done", "canceled", "no_show")
+COUNTERS = tuple(f"count_{st}" for st in STATUSES)
+METRICS = ("income_cents", "expense_cents") + COUNTERS
+
+# (start_at, price_cents, status_antigo, status_novo) — None = appointment criado/removido
+AppointmentChange = tuple[datetime, int, str | None, str | None]
+
+
+def _apply(db: Session, tenant_id: int, deltas: dict[date, dict[str, int]]) -> None:
+    rows = []
+    for day, delta in deltas.items():
+        if any(delta.values()):
+            rows.append({"tenant_id": tenant_id, "day": day, **{m: delta.get(m, 0) for m in METRICS}})
+    if not rows:
+        return
+
+    # ✅ upsert com incremento atômico: col = col + excluded.col (uma linha por dia tocado)
+    stmt = dialect_insert(db, FinanceDailyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FinanceDailyRollup.tenant_id, FinanceDailyRollup.day],
+        set_={m: getattr(FinanceDailyRollup, m) + getattr(stmt.excluded, m) for m in METRICS},
+    )
+    db.execute(stmt)
+
+
+def record_appointment_changes(db: Session, tenant_id: int, changes: Iterable[AppointmentChange]) -> None:
+    """Aplica no rollup as transições de status (na mesma transação do chamador)."""
+    deltas: dict[date, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for start_at, price_cents, old, new in changes:
+        if old == new:
+            continue
+        delta = deltas[start_at.date()]
+        if old in STATUSES:
+            delta[f"count_{old}"] -= 1
+        if new in STATUSES:
+            delta[f"count_{new}"] += 1
+        if old == "done":
+            delta["income_cents"] -= int(price_cents or 0)
+        if new == "done":
+            delta["income_cents"] += int(price_cents or 0)
+    _apply(db, tenant_id, deltas)
+
+
+def record_expense(db: Session, tenant_id: int, spent_at: datetime, amount_cents: int) -> None:
+    """amount_cents positivo ao criar, negativo ao excluir."""
+    _apply(db, tenant_id, {spent_at.date(): {"expense_cents": int(amount_cents or 0)}})
+
+
+def as_date(value) -> date:
+    # date() volta como date no Postgres e como texto no SQLite
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def rebuild_rollup(db: Session, tenant_id: int | None = None) -> int:
+    """Recalcula o rollup a partir das tabelas brutas (corrige qualquer drift). Retorna nº de linhas."""
+    appt_day = func.date(Appointment.start_at)
+    appt_q = select(
+        Appointment.tenant_id,
+        appt_day.label("day"),
+        func.coalesce(func.sum(Appointment.price_cents).filter(Appointment.status == "done"), 0).label("income_cents"),
+        *[func.count().filter(Appointment.status == st).label(f"count_{st}") for st in STATUSES],
+    ).group_by(Appointment.tenant_id, appt_day)
+
+    exp_day = func.date(Expense.spent_at)
+    exp_q = select(
+        Expense.tenant_id,
+        exp_day.label("day"),
+        func.coalesce(func.sum(Expense.amount_cents), 0).label("expense_cents"),
+    ).group_by(Expense.tenant_id, exp_day)
+
+    wipe = delete(FinanceDailyRollup)
+    if tenant_id is not None:
+        appt_q = appt_q.where(Appointment.tenant_id == tenant_id)
+        exp_q = exp_q.where(Expense.tenant_id == tenant_id)
+        wipe = wipe.where(FinanceDailyRollup.tenant_id == tenant_id)
+
+    rows: dict[tuple[int, date], dict] = {}
+
+    def row_for(t_id: int, day) -> dict:
+        key = (t_id, as_date(day))
+        if key not in rows:
+            rows[key] = {"tenant_id": key[0], "day": key[1], **{m: 0 for m in METRICS}}
+        return rows[key]
+
+    for r in db.execute(appt_q):
+        row = row_for(r.tenant_id, r.day)
+        row["income_cents"] = int(r.income_cents or 0)
+        for c in COUNTERS:
+            row[c] = int(getattr(r, c) or 0)
+
+    for r in db.execute(exp_q):
+        row_for(r.tenant_id, r.day)["expense_cents"] = int(r.expense_cents or 0)
+
+    db.execute(wipe)
+    values = list(rows.values())
+    for i in range(0, len(values), 5000):
+        db.execute(insert(FinanceDailyRollup), values[i:i + 5000])
+    return len(values)
+
+
+def read_rollup(db: Session, tenant_id: int, start: date, end: date) -> list[FinanceDailyRollup]:
+    """Linhas do período [start, end) — O(dias), independente do volume de consultas."""
+    return (
+        db.query(FinanceDailyRollup)
+        .filter(
+            FinanceDailyRollup.tenant_id == tenant_id,
+            FinanceDailyRollup.day >= start,
+            FinanceDailyRollup.day < end,
+        )
+        .all()
+    )
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from app.core.metrics import TimingStat
+from app.settings import settings
+
+
+class KdfPool:
+    """Pool dedicado para o Argon2 (hash/verify), com limite de fila.
+
+    argon2-cffi libera o GIL durante o hash, então threads bastam. O limite
+    `max_pending` conta trabalhos em execução + na fila; passou disso o request
+    recebe 503 na hora em vez de prender um worker do threadpool do Starlette.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kdf")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.queue_wait = TimingStat()
+        self.hash_time = TimingStat()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, tente novamente",
+                headers={"Retry-After": "1"},
+            )
+
+        enqueued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            self.queue_wait.observe(started_at - enqueued_at)
+            try:
+                return fn(*args)
+            finally:
+                self.hash_time.observe(time.perf_counter() - started_at)
+                self._slots.release()
+
+        try:
+            return self._executor.submit(job)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected = self.rejected
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "rejected": rejected,
+            "queue_wait": self.queue_wait.stats(),
+            "hash_time": self.hash_time.stats(),
+        }
+
+
+kdf_pool = KdfPool(workers=settings.KDF_WORKERS, max_pending=settings.KDF_MAX_PENDING)
@@ -0,0 +1,21 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+# ✅ dinheiro é guardado em centavos (inteiro): soma exata no banco, sem drift de float
+
+
+def to_cents(value) -> int:
+    """Converte reais (float/str/Decimal) em centavos, arredondando meio centavo pra cima."""
+    if value is None:
+        return 0
+    # str() antes do Decimal: 0.1 vira "0.1", não 0.1000000000000000055...
+    return int((Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int | None) -> float:
+    """Centavos → reais para a resposta da API (o cálculo já foi feito em inteiros)."""
+    return (cents or 0) / 100
+
+
+def cents_to_str(cents: int | None) -> str:
+    """Centavos → "150.50" exato (para CSV), sem passar por float."""
+    return str(Decimal(cents or 0).scaleb(-2))
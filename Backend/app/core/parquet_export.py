@@ -0,0 +1,109 @@
+"""Export colunar (Parquet) dos dados de um tenant para o time de análise.
+
+pyarrow é importado só aqui dentro: sem ele a rota responde 501 e o resto da API segue normal.
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.session_note import SessionNote
+
+BATCH_ROWS = 50_000
+FILE_CHUNK_BYTES = 64 * 1024
+
+# ✅ prontuário: só metadados, NUNCA o content
+EXPORT_COLUMNS = {
+    "appointments": (
+        Appointment,
+        [
+            Appointment.id,
+            Appointment.start_at,
+            Appointment.end_at,
+            Appointment.status,
+            Appointment.price_cents,
+            Appointment.patient_user_id,
+        ],
+    ),
+    "expenses": (
+        Expense,
+        [Expense.id, Expense.spent_at, Expense.title, Expense.amount_cents],
+    ),
+    "session_notes": (
+        SessionNote,
+        [
+            SessionNote.id,
+            SessionNote.patient_id,
+            SessionNote.appointment_id,
+            SessionNote.session_date,
+            SessionNote.is_locked,
+            SessionNote.created_at,
+            SessionNote.updated_at,
+        ],
+    ),
+}
+
+
+def _arrow_schema(pa, columns):
+    # schema fixo a partir do tipo da coluna: arquivo vazio também sai tipado
+    types = {
+        "INTEGER": pa.int64(),
+        "BIGINT": pa.int64(),
+        "DATETIME": pa.timestamp("us"),
+        "DATE": pa.date32(),
+        "BOOLEAN": pa.bool_(),
+    }
+    return pa.schema([
+        pa.field(c.key, types.get(str(c.type).split("(")[0], pa.string()))
+        for c in columns
+    ])
+
+
+def write_table(db: Session, name: str, tenant_id: int, path: str) -> int:
+    """Grava `name` do tenant em Parquet lendo do banco em lotes. Retorna nº de linhas."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model, columns = EXPORT_COLUMNS[name]
+    schema = _arrow_schema(pa, columns)
+    stmt = (
+        select(*columns)
+        .where(model.tenant_id == tenant_id)
+        .order_by(model.id)
+        .execution_options(yield_per=BATCH_ROWS)
+    )
+
+    total = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in db.execute(stmt).partitions():
+            # linhas → colunas → RecordBatch (um row group por lote)
+            arrays = [pa.array(col, type=field.type) for col, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            total += len(rows)
+    return total
+
+
+def export_tenant_zip(db: Session, tenant_id: int) -> Iterator[bytes]:
+    """Um .parquet por tabela dentro de um zip, transmitido em pedaços e apagado no fim."""
+    workdir = tempfile.mkdtemp(prefix=f"tenant{tenant_id}_")
+    try:
+        zip_path = os.path.join(workdir, "export.zip")
+        # parquet já vem comprimido: ZIP_STORED evita recomprimir
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name in EXPORT_COLUMNS:
+                path = os.path.join(workdir, f"{name}.parquet")
+                write_table(db, name, tenant_id, path)
+                zf.write(path, arcname=f"{name}.parquet")
+                os.remove(path)
+
+        with open(zip_path, "rb") as f:
+            while chunk := f.read(FILE_CHUNK_BYTES):
+                yield chunk
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
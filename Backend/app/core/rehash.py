@@ -0,0 +1,25 @@
+from fastapi import HTTPException
+
+from app.core.security import hash_password
+from app.database import SessionLocal
+
+
+def rehash_password(model, row_id: int, old_hash: str, plain: str) -> None:
+    """Regrava o hash com o perfil atual (roda como BackgroundTask após o login)."""
+    try:
+        new_hash = hash_password(plain)
+    except HTTPException:
+        # pool do KDF cheio: tenta de novo no próximo login
+        return
+
+    db = SessionLocal()
+    try:
+        # só troca se a senha não mudou nesse meio tempo
+        (
+            db.query(model)
+            .filter(model.id == row_id, model.password_hash == old_hash)
+            .update({model.password_hash: new_hash}, synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Hashable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.database import dialect_insert
+from app.models.cache_generation import CacheGeneration
+from app.settings import settings
+
+# ✅ geração por tenant (tabela cache_generations): toda escrita que mexe no financeiro
+# incrementa depois do commit, e as chaves antigas simplesmente deixam de ser lidas
+# (saem pelo LRU/TTL). Como a geração mora no banco, vale para todos os workers; cada
+# worker guarda a última que viu por RESPONSE_CACHE_GENERATION_TTL_SECONDS.
+
+response_cache = TTLCache(
+    maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+_seen_generations = TTLCache(
+    maxsize=settings.TENANT_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_GENERATION_TTL_SECONDS,
+)
+_seen_lock = threading.Lock()
+
+
+def _remember_generation(tenant_id: int, generation: int) -> int:
+    # só anda pra frente: uma réplica atrasada não desfaz um bump já visto aqui
+    with _seen_lock:
+        generation = max(generation, _seen_generations.get(tenant_id, 0))
+        _seen_generations.set(tenant_id, generation)
+    return generation
+
+
+def bump_generation(db: Session, tenant_id: int) -> None:
+    """Chamar DEPOIS do commit da escrita: upsert curto em transação própria.
+
+    Fica fora do caminho crítico de quem escreve (nenhum lock segurado durante a
+    transação principal). Se falhar, o cache só expira pelo TTL.
+    """
+    stmt = dialect_insert(db, CacheGeneration).values(tenant_id=tenant_id, generation=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CacheGeneration.tenant_id],
+        set_={"generation": CacheGeneration.generation + 1},
+    ).returning(CacheGeneration.generation)
+    try:
+        generation = db.execute(stmt).scalar_one()
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print("⚠️ bump da geração do cache falhou:", e)
+        return
+    _remember_generation(tenant_id, generation)
+
+
+def _read_generation(db: Session, tenant_id: int) -> int:
+    return db.execute(
+        select(CacheGeneration.generation).where(CacheGeneration.tenant_id == tenant_id)
+    ).scalar() or 0
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+def cached_json(
+    request: Request,
+    db: Session,
+    tenant_id: int,
+    key: Hashable,
+    compute: Callable[[], Any],
+    headers: Callable[[Any], dict[str, str]] | None = None,
+) -> Response:
+    """Serve `compute()` (já validado pelo schema) do cache, com ETag/If-None-Match → 304.
+
+    `db` é a sessão usada pelo `compute` (pode ser a réplica). No acerto não há query se a
+    geração vista ainda vale; na falta, a geração é lida nessa mesma sessão antes do
+    cálculo e marca a entrada: resultado de réplica atrasada fica sob a geração que a
+    réplica mostrava e sai de uso no próximo bump.
+    """
+    read_now = None
+    generation = _seen_generations.get(tenant_id)
+    if generation is None:
+        read_now = _read_generation(db, tenant_id)
+        generation = _remember_generation(tenant_id, read_now)
+
+    entry = response_cache.get((tenant_id, generation, key))
+    if entry is None:
+        # lida antes do cálculo, na mesma sessão: os dados são no mínimo dessa geração
+        if read_now is None:
+            read_now = _read_generation(db, tenant_id)
+        data = jsonable_encoder(compute())
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        extra = headers(data) if headers else {}
+        entry = (body, etag, extra)
+        response_cache.set((tenant_id, read_now, key), entry)
+
+    body, etag, extra = entry
+    resp_headers = {"ETag": etag, "Cache-Control": "private, no-cache", **extra}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=resp_headers)
+    return Response(content=body, media_type="application/json", headers=resp_headers)
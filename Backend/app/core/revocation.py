@@ -0,0 +1,159 @@
+import threading
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.tenant_cache import TenantState, invalidate_tenant_state, tenant_state_of
+from app.database import SessionLocal
+from app.models.auth_revocation import AuthRevocation
+from app.models.tenant import Tenant
+from app.settings import settings
+
+TENANT_WIDE = 0
+PENDING_KEY = "pending_revocations"
+
+
+class RevocationTable:
+    """Snapshot em memória dos epochs de revogação e do estado dos tenants.
+
+    Usado pelo modo AUTH_STATELESS: o request só consulta o dicionário; o banco
+    é lido no máximo uma vez a cada `refresh_seconds` por processo.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._epochs: dict[tuple[int, int], int] = {}
+        self._tenants: dict[int, TenantState] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def ensure_fresh(self) -> None:
+        """Recarrega se venceu (I/O síncrono: no event loop, chamar via threadpool)."""
+        if not self.stale():
+            return
+        # só uma thread recarrega; as outras seguem com o snapshot atual
+        if not self._lock.acquire(blocking=self._loaded_at == 0.0):
+            return
+        try:
+            if self.stale():
+                self.refresh()
+        finally:
+            self._lock.release()
+
+    def refresh(self) -> None:
+        # revogações mais antigas que a validade máxima do token não importam mais
+        horizon = int(time.time()) - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+        db = SessionLocal()
+        try:
+            epochs = {
+                (r.tenant_id, r.user_id): r.epoch
+                for r in db.query(AuthRevocation.tenant_id, AuthRevocation.user_id, AuthRevocation.epoch)
+                .filter(AuthRevocation.epoch >= horizon)
+                .all()
+            }
+            tenants = {
+                r.id: tenant_state_of(r)
+                for r in db.query(Tenant.id, Tenant.slug, Tenant.is_active, Tenant.license_expires_at).all()
+            }
+        finally:
+            db.close()
+
+        self._epochs = epochs
+        self._tenants = tenants
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    def tenant(self, tenant_id: int) -> TenantState | None:
+        return self._tenants.get(tenant_id)
+
+    def remember_tenant(self, state: TenantState) -> None:
+        # tenant criado/alterado depois do último snapshot
+        tenants = dict(self._tenants)
+        tenants[state.id] = state
+        self._tenants = tenants
+
+    def epoch(self, tenant_id: int, user_id: int) -> int:
+        return max(
+            self._epochs.get((tenant_id, TENANT_WIDE), 0),
+            self._epochs.get((tenant_id, user_id), 0),
+        )
+
+    def is_revoked(self, tenant_id: int, user_id: int, rev: int | None, iat: int) -> bool:
+        epoch = self.epoch(tenant_id, user_id)
+        if rev is not None:
+            # token carrega o epoch vigente na emissão: qualquer bump depois dele o derruba
+            return rev < epoch
+        # token antigo (sem `rev`): compara pelo iat
+        return iat < epoch
+
+    def remember(self, tenant_id: int, user_id: int, epoch: int) -> None:
+        epochs = dict(self._epochs)
+        epochs[(tenant_id, user_id)] = epoch
+        self._epochs = epochs
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._epochs),
+            "tenants": len(self._tenants),
+            "refreshes": self.refreshes,
+            "refresh_seconds": self.refresh_seconds,
+        }
+
+
+revocations = RevocationTable(settings.AUTH_REVOCATION_REFRESH_SECONDS)
+
+
+def current_epoch(db: Session, tenant_id: int, user_id: int) -> int:
+    """Epoch em vigor para o usuário (o maior entre o do tenant e o dele); vai no token como `rev`."""
+    return db.query(func.coalesce(func.max(AuthRevocation.epoch), 0)).filter(
+        AuthRevocation.tenant_id == tenant_id,
+        AuthRevocation.user_id.in_((TENANT_WIDE, user_id)),
+    ).scalar()
+
+
+def bump_revocation_epoch(db: Session, tenant_id: int, user_id: int = TENANT_WIDE) -> None:
+    """Invalida os tokens já emitidos do usuário (ou do tenant inteiro, user_id=0).
+
+    Grava junto com a transação do chamador; o commit fica por conta dele. O snapshot
+    em memória deste worker só é atualizado quando esse commit acontece.
+    """
+    # o novo epoch passa de todo epoch que os tokens afetados podem carregar em `rev`;
+    # token emitido depois do bump (mesmo no mesmo segundo) leva o novo valor e vale
+    scope = AuthRevocation.tenant_id == tenant_id
+    if user_id != TENANT_WIDE:
+        scope = scope & AuthRevocation.user_id.in_((TENANT_WIDE, user_id))
+    latest = db.query(func.coalesce(func.max(AuthRevocation.epoch), 0)).filter(scope).scalar()
+    epoch = max(int(time.time()), latest + 1)
+
+    row = (
+        db.query(AuthRevocation)
+        .filter(AuthRevocation.tenant_id == tenant_id, AuthRevocation.user_id == user_id)
+        .first()
+    )
+    if row:
+        row.epoch = epoch
+    else:
+        db.add(AuthRevocation(tenant_id=tenant_id, user_id=user_id, epoch=epoch))
+
+    # memória só depois do commit: revogação que não chegou no banco não vale em nenhum worker
+    db.info.setdefault(PENDING_KEY, []).append((tenant_id, user_id, epoch))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session) -> None:
+    for tenant_id, user_id, epoch in session.info.pop(PENDING_KEY, ()):
+        revocations.remember(tenant_id, user_id, epoch)
+        if user_id == TENANT_WIDE:
+            invalidate_tenant_state(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -1,9 +1,44 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from passlib.context import CryptContext
 from app.settings import settings
+from app.core.cache import TTLCache
+from app.core.kdf import kdf_pool
 
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+# ✅ perfis de custo do Argon2 (memory_cost em KiB). "default" = padrão do passlib,
+# então trocar de perfil é o que dispara o rehash no próximo login.
+ARGON2_PROFILES: dict[str, dict[str, int]] = {
+    "low": {"memory_cost": 19456, "time_cost": 2, "parallelism": 1},
+    "default": {"memory_cost": 102400, "time_cost": 2, "parallelism": 8},
+    "high": {"memory_cost": 262144, "time_cost": 3, "parallelism": 8},
+}
+
+def argon2_params(profile: str | None = None) -> dict[str, int]:
+    name = profile or settings.ARGON2_PROFILE
+    if name not in ARGON2_PROFILES:
+        raise ValueError(f"ARGON2_PROFILE inválido: {name}")
+    params = dict(ARGON2_PROFILES[name])
+    # ajuste fino por env (vale só para o perfil configurado)
+    if profile is None:
+        for key, value in (
+            ("memory_cost", settings.ARGON2_MEMORY_COST),
+            ("time_cost", settings.ARGON2_TIME_COST),
+            ("parallelism", settings.ARGON2_PARALLELISM),
+        ):
+            if value is not None:
+                params[key] = value
+    return params
+
+def build_crypt_context(params: dict[str, int]) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        **{f"argon2__{key}": value for key, value in params.items()},
+    )
+
+pwd_context = build_crypt_context(argon2_params())
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 dias
@@ -16,14 +51,28 @@ def _platform_secret() -> str:
     # ✅ recomendado: setar PLATFORM_SECRET_KEY no Render
     return getattr(settings, "PLATFORM_SECRET_KEY", None) or settings.SECRET_KEY
 
+# ✅ Argon2 roda no pool dedicado (app.core.kdf), com limite de fila e 503 em sobrecarga
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return kdf_pool.run(pwd_context.hash, password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return kdf_pool.run(pwd_context.verify, plain, hashed)
+
+async def hash_password_async(password: str) -> str:
+    return await kdf_pool.run_async(pwd_context.hash, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await kdf_pool.run_async(pwd_context.verify, plain, hashed)
+
+def password_needs_rehash(hashed: str) -> bool:
+    # bcrypt legado ou Argon2 com parâmetros diferentes do perfil atual
+    try:
+        return pwd_context.needs_update(hashed)
+    except Exception:
+        return False
 
 # ✅ token do tenant (admin/patient)
-def create_access_token(*, subject: str, tenant_id: int, role: str) -> str:
+def create_access_token(*, subject: str, tenant_id: int, role: str, rev: int = 0) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {
@@ -32,6 +81,7 @@ def create_access_token(*, subject: str, tenant_id: int, role: str) -> str:
         "role": role,           # ✅ crucial
         "type": "tenant",       # ✅ crucial
         "iat": int(now.timestamp()),
+        "rev": rev,             # epoch de revogação vigente na emissão (modo stateless)
         "exp": exp,
     }
     return jwt.encode(payload, _tenant_secret(), algorithm=ALGORITHM)
@@ -48,7 +98,23 @@ def create_platform_token(*, subject: str) -> str:
     }
     return jwt.encode(payload, _platform_secret(), algorithm=ALGORITHM)
 
-def decode_tenant_token(token: str) -> dict | None:
+# ✅ cache de tokens já verificados: o front manda o mesmo bearer centenas de vezes por sessão
+tenant_token_cache = TTLCache(maxsize=settings.JWT_CACHE_MAX_ENTRIES, ttl=settings.JWT_CACHE_TTL_SECONDS)
+platform_token_cache = TTLCache(maxsize=settings.JWT_CACHE_MAX_ENTRIES, ttl=settings.JWT_CACHE_TTL_SECONDS)
+
+def _token_key(token: str) -> bytes:
+    # não guarda o token em si na memória, só o digest
+    return hashlib.sha256(token.encode()).digest()
+
+def _cache_ttl(payload: dict) -> float:
+    # nunca cacheia além do exp do próprio token
+    try:
+        remaining = float(payload["exp"]) - time.time()
+    except Exception:
+        return 0.0
+    return min(remaining, settings.JWT_CACHE_TTL_SECONDS)
+
+def _decode_tenant_token_uncached(token: str) -> dict | None:
     try:
         payload = jwt.decode(token, _tenant_secret(), algorithms=[ALGORITHM])
         if payload.get("type") != "tenant":
@@ -57,11 +123,36 @@ def decode_tenant_token(token: str) -> dict | None:
     except Exception:
         return None
 
-def decode_platform_token(token: str) -> int | None:
+def _decode_platform_token_uncached(token: str) -> dict | None:
     try:
         payload = jwt.decode(token, _platform_secret(), algorithms=[ALGORITHM])
         if payload.get("type") != "platform_admin":
             return None
+        return payload
+    except Exception:
+        return None
+
+def decode_tenant_token(token: str) -> dict | None:
+    key = _token_key(token)
+    payload = tenant_token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = _decode_tenant_token_uncached(token)
+    if payload is not None:
+        tenant_token_cache.set(key, payload, ttl=_cache_ttl(payload))
+    return payload
+
+def decode_platform_token(token: str) -> int | None:
+    key = _token_key(token)
+    payload = platform_token_cache.get(key)
+    if payload is None:
+        payload = _decode_platform_token_uncached(token)
+        if payload is None:
+            return None
+        platform_token_cache.set(key, payload, ttl=_cache_ttl(payload))
+
+    try:
         return int(payload.get("sub"))
     except Exception:
-        return None
\ No newline at end of file
+        return None
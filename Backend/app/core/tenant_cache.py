@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.cache import TTLCache
+from app.settings import settings
+
+
+@dataclass(frozen=True)
+class TenantState:
+    id: int
+    slug: str
+    is_active: bool
+    license_expires_at: datetime | None
+
+
+def tenant_state_of(t) -> TenantState:
+    # Tenant do ORM ou linha com as mesmas colunas
+    return TenantState(
+        id=t.id,
+        slug=t.slug,
+        is_active=bool(t.is_active),
+        license_expires_at=t.license_expires_at,
+    )
+
+
+# ✅ cache por processo: cada worker do uvicorn tem o seu.
+# Invalidação explícita vale só no worker que fez a escrita; nos demais o TTL limita a defasagem.
+tenant_state_cache = TTLCache(
+    maxsize=settings.TENANT_CACHE_MAX_ENTRIES,
+    ttl=settings.TENANT_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_tenant_state(tenant_id: int) -> None:
+    tenant_state_cache.invalidate(tenant_id)
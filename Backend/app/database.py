@@ -1,25 +1,119 @@
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.settings import settings
+from app.core.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, install_idle_validation
 
 # Garante que a URL use 'postgresql://' mesmo que venha como 'postgres://'
 db_url = settings.SQLALCHEMY_DATABASE_URI
 if db_url and db_url.startswith("postgres://"):
     db_url = db_url.replace("postgres://", "postgresql://", 1)
 
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 engine = create_engine(
     db_url, # Usamos a URL tratada
-    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
+    **_pool_kwargs(),
 )
+if not settings.DB_POOL_PRE_PING and settings.DB_POOL_VALIDATE_INTERVAL > 0:
+    install_idle_validation(engine, settings.DB_POOL_VALIDATE_INTERVAL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ✅ réplica de leitura (DATABASE_REPLICA_URL). Sem réplica, lê do primário.
+replica_url = settings.SQLALCHEMY_REPLICA_URI
+read_engine = engine
+if replica_url:
+    read_engine = create_engine(
+        replica_url,
+        poolclass=InstrumentedQueuePool,
+        **_pool_kwargs(),
+    )
+    if not settings.DB_POOL_PRE_PING and settings.DB_POOL_VALIDATE_INTERVAL > 0:
+        install_idle_validation(read_engine, settings.DB_POOL_VALIDATE_INTERVAL)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+def async_url(url: str) -> str:
+    # mesma base, driver async: psycopg 3 (já no requirements) / aiosqlite para testes locais
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("postgresql"):
+        return "postgresql+psycopg://" + rest
+    if scheme.startswith("sqlite"):
+        return "sqlite+aiosqlite://" + rest
+    return url
+
+
+# ✅ modo async (opt-in): só cria o engine se DB_ASYNC=true, para não exigir driver async à toa
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+AsyncReadSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        async_url(db_url),
+        poolclass=InstrumentedAsyncQueuePool,
+        **_pool_kwargs(),
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async_read_engine = async_engine
+    if replica_url:
+        async_read_engine = create_async_engine(
+            async_url(replica_url),
+            poolclass=InstrumentedAsyncQueuePool,
+            **_pool_kwargs(),
+        )
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 class Base(DeclarativeBase):
     pass
 
+def dialect_insert(db, table):
+    # INSERT com suporte a ON CONFLICT (Postgres em produção, SQLite em testes locais)
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db(db=Depends(get_db)):
+    # só para rotas de leitura sem read-your-writes (a réplica pode estar atrasada)
+    if read_engine is engine:
+        # ✅ sem réplica: reaproveita a sessão do request (a mesma do get_current_user);
+        # uma segunda sessão no mesmo pool seguraria 2 conexões por request
+        yield db
+        return
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(db=Depends(get_async_db)):
+    if async_read_engine is async_engine:
+        yield db
+        return
+    async with AsyncReadSessionLocal() as read_db:
+        yield read_db
@@ -1,20 +1,151 @@
+from dataclasses import dataclass
+from datetime import datetime
+
 from fastapi import Depends, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.core.security import decode_tenant_token
+from app.core.tenant_cache import TenantState, tenant_state_cache
+from app.core.revocation import revocations
+from app.settings import settings
 
 bearer = HTTPBearer(auto_error=True)
 
-def get_current_user(
-    cred: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-    x_tenant_slug: str | None = Header(default=None, alias="X-Tenant-Slug"),
-) -> User:
-    token = cred.credentials
+
+@dataclass(frozen=True)
+class Principal:
+    # ✅ o mínimo que as rotas usam (id/tenant_id/role), sem hidratar o User do ORM
+    id: int
+    tenant_id: int
+    role: str
+    slug: str
+    license_expires_at: datetime | None
+
+
+def _principal_stmt(user_id: int, tenant_id: int, cached_state: TenantState | None):
+    user_filter = (
+        User.id == user_id,
+        User.tenant_id == tenant_id,
+        User.is_active == True,
+    )
+
+    # tenant em cache: basta confirmar o usuário (colunas leves)
+    if cached_state is not None:
+        return select(User.id, User.role).where(*user_filter)
+
+    # 1 round-trip só: user + tenant no mesmo SELECT
+    return (
+        select(
+            User.id,
+            User.role,
+            Tenant.slug,
+            Tenant.is_active,
+            Tenant.license_expires_at,
+        )
+        .join(Tenant, Tenant.id == User.tenant_id)
+        .where(*user_filter)
+    )
+
+
+def _principal_from_row(row, tenant_id: int, state: TenantState | None) -> tuple[Principal, TenantState] | None:
+    if not row:
+        return None
+
+    if state is None:
+        state = TenantState(
+            id=tenant_id,
+            slug=row.slug,
+            is_active=bool(row.is_active),
+            license_expires_at=row.license_expires_at,
+        )
+        tenant_state_cache.set(tenant_id, state)
+
+    principal = Principal(
+        id=row.id,
+        tenant_id=tenant_id,
+        role=row.role,
+        slug=state.slug,
+        license_expires_at=state.license_expires_at,
+    )
+    return principal, state
+
+
+def load_principal(db: Session, user_id: int, tenant_id: int) -> tuple[Principal, TenantState] | None:
+    state = tenant_state_cache.get(tenant_id)
+    row = db.execute(_principal_stmt(user_id, tenant_id, state)).first()
+    return _principal_from_row(row, tenant_id, state)
+
+
+async def load_principal_async(db: AsyncSession, user_id: int, tenant_id: int) -> tuple[Principal, TenantState] | None:
+    state = tenant_state_cache.get(tenant_id)
+    row = (await db.execute(_principal_stmt(user_id, tenant_id, state))).first()
+    return _principal_from_row(row, tenant_id, state)
+
+
+def check_tenant(state: TenantState, x_tenant_slug: str | None) -> None:
+    # ✅ Kill switch/licença (recomendado)
+    if not state.is_active:
+        raise HTTPException(status_code=403, detail="Tenant desativado")
+
+    # (opcional) valida header X-Tenant-Slug
+    if x_tenant_slug and state.slug != x_tenant_slug:
+        raise HTTPException(status_code=401, detail="Tenant inválido")
+
+    # (opcional) licença
+    if state.license_expires_at is not None:
+        if state.license_expires_at <= datetime.utcnow():
+            raise HTTPException(status_code=403, detail="Licença expirada")
+
+
+def _claims_revoked(payload: dict, user_id: int, tenant_id: int) -> bool:
+    try:
+        iat = int(payload.get("iat"))
+        rev = payload.get("rev")
+        rev = None if rev is None else int(rev)
+    except Exception:
+        return True
+    return revocations.is_revoked(tenant_id, user_id, rev, iat)
+
+
+def principal_from_claims(payload: dict, user_id: int, tenant_id: int) -> tuple[Principal, TenantState] | None:
+    # ✅ modo stateless: nenhuma query; kill switch via epoch de revogação + snapshot dos tenants
+    # (o chamador garante o snapshot fresco: revocations.ensure_fresh)
+    if _claims_revoked(payload, user_id, tenant_id):
+        return None
+
+    state = revocations.tenant(tenant_id)
+    if state is None:
+        return None
+
+    principal = Principal(
+        id=user_id,
+        tenant_id=tenant_id,
+        role=payload.get("role"),
+        slug=state.slug,
+        license_expires_at=state.license_expires_at,
+    )
+    return principal, state
+
+
+def snapshot_miss(payload: dict, user_id: int, tenant_id: int) -> bool:
+    # tenant criado depois do último snapshot (em outro worker): confere no banco em vez de dar 401
+    return revocations.tenant(tenant_id) is None and not _claims_revoked(payload, user_id, tenant_id)
+
+
+def _remember_loaded(loaded: tuple[Principal, TenantState] | None) -> tuple[Principal, TenantState] | None:
+    if loaded:
+        revocations.remember_tenant(loaded[1])
+    return loaded
+
+
+def _token_identity(token: str) -> tuple[dict, int, int]:
     payload = decode_tenant_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Token inválido")
@@ -25,41 +156,61 @@ def get_current_user(
     except Exception:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    user = (
-        db.query(User)
-        .filter(
-            User.id == user_id,
-            User.tenant_id == tenant_id,
-            User.is_active == True,
-        )
-        .first()
-    )
-    if not user:
+    return payload, user_id, tenant_id
+
+
+def get_current_user(
+    cred: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db),
+    x_tenant_slug: str | None = Header(default=None, alias="X-Tenant-Slug"),
+) -> Principal:
+    payload, user_id, tenant_id = _token_identity(cred.credentials)
+
+    if settings.AUTH_STATELESS:
+        revocations.ensure_fresh()
+        loaded = principal_from_claims(payload, user_id, tenant_id)
+        if loaded is None and snapshot_miss(payload, user_id, tenant_id):
+            loaded = _remember_loaded(load_principal(db, user_id, tenant_id))
+    else:
+        loaded = load_principal(db, user_id, tenant_id)
+    if not loaded:
         raise HTTPException(status_code=401, detail="Sessão inválida")
 
-    # ✅ Kill switch/licença (recomendado)
-    t = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-    if not t or not t.is_active:
-        raise HTTPException(status_code=403, detail="Tenant desativado")
+    principal, state = loaded
+    check_tenant(state, x_tenant_slug)
+    return principal
 
-    # (opcional) valida header X-Tenant-Slug
-    if x_tenant_slug and t.slug != x_tenant_slug:
-        raise HTTPException(status_code=401, detail="Tenant inválido")
 
-    # (opcional) licença
-    if t.license_expires_at is not None:
-        from datetime import datetime
-        if t.license_expires_at <= datetime.utcnow():
-            raise HTTPException(status_code=403, detail="Licença expirada")
+async def get_current_user_async(
+    cred: HTTPAuthorizationCredentials = Depends(bearer),
+    db: AsyncSession = Depends(get_async_db),
+    x_tenant_slug: str | None = Header(default=None, alias="X-Tenant-Slug"),
+) -> Principal:
+    payload, user_id, tenant_id = _token_identity(cred.credentials)
 
-    return user
+    if settings.AUTH_STATELESS:
+        if revocations.stale():
+            # refresh do snapshot é I/O síncrono: fora do event loop
+            await run_in_threadpool(revocations.ensure_fresh)
+        loaded = principal_from_claims(payload, user_id, tenant_id)
+        if loaded is None and snapshot_miss(payload, user_id, tenant_id):
+            loaded = _remember_loaded(await load_principal_async(db, user_id, tenant_id))
+    else:
+        loaded = await load_principal_async(db, user_id, tenant_id)
+    if not loaded:
+        raise HTTPException(status_code=401, detail="Sessão inválida")
+
+    principal, state = loaded
+    check_tenant(state, x_tenant_slug)
+    return principal
 
-def require_admin(user: User = Depends(get_current_user)):
+
+def require_admin(user: Principal = Depends(get_current_user)):
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Apenas admin")
     return user
 
-def require_patient(user: User = Depends(get_current_user)):
+def require_patient(user: Principal = Depends(get_current_user)):
     if user.role != "patient":
         raise HTTPException(status_code=403, detail="Apenas paciente")
-    return user
\ No newline at end of file
+    return user
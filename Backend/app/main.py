@@ -1,33 +1,51 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from datetime import datetime
 
-from app.database import Base, engine, SessionLocal
+from app.database import Base, engine, SessionLocal, async_engine
+from app.settings import settings
 
 # IMPORTA MODELS para o create_all enxergar tudo
 from app.models import (
-    user, tenant, patient, appointment, session_note, expense, platform_admin
+    user, tenant, patient, appointment, session_note, expense, platform_admin, auth_revocation,
+    finance_rollup, availability_template, cache_generation,
 )
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.models.platform_admin import PlatformAdmin
 
 from app.core.security import hash_password
+from app.core.availability import roll_forward
+from app.migrations import run_migrations
 
 # ROUTERS
-from app.routes import auth, patients, appointments, session_notes, admin
+from app.routes import auth, patients, appointments, session_notes, admin, exports, availability
 # ✅ NOVO: rota da dona do sistema (SuperAdmin)
 from app.routes import platform
 
 
+async def availability_horizon_job():
+    # ✅ rola a agenda pra frente em thread (não trava o event loop); idempotente
+    while True:
+        try:
+            created = await asyncio.to_thread(roll_forward, settings.AVAILABILITY_HORIZON_DAYS)
+            if any(created.values()):
+                print("✅ agenda aberta pelos templates:", created)
+        except Exception as e:
+            print("⚠️ job de horizonte da agenda falhou:", e)
+        await asyncio.sleep(settings.AVAILABILITY_HORIZON_INTERVAL_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # ----------------------------
     # STARTUP
     # ----------------------------
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine, contract=settings.MIGRATIONS_CONTRACT or engine.dialect.name == "sqlite")
 
     db = SessionLocal()
     try:
@@ -100,14 +118,22 @@ async def lifespan(app: FastAPI):
         print("✅ DEFAULT TENANT ok:", tenant_slug, "id:", t.id)
         print("✅ TENANT ADMIN ok:", admin_email)
 
-        yield
-
     finally:
         db.close()
 
+    horizon_task = None
+    if settings.AVAILABILITY_HORIZON_DAYS > 0:
+        horizon_task = asyncio.create_task(availability_horizon_job())
+
+    yield
+
     # ----------------------------
     # SHUTDOWN (opcional)
     # ----------------------------
+    if horizon_task is not None:
+        horizon_task.cancel()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 app = FastAPI(title="PeegFlow - Psy System API", lifespan=lifespan)
@@ -122,12 +148,19 @@ app.add_middleware(
     max_age=86400,
 )
 
+# ✅ modo async: leituras da agenda registradas antes, têm precedência sobre as sync
+if settings.DB_ASYNC:
+    from app.routes import appointments_async
+    app.include_router(appointments_async.router)
+
 # ✅ Rotas normais
 app.include_router(auth.router)
 app.include_router(patients.router)
 app.include_router(appointments.router)
 app.include_router(session_notes.router)
 app.include_router(admin.router)
+app.include_router(exports.router)
+app.include_router(availability.router)
 
 # ✅ Rotas da dona do sistema (SuperAdmin / Platform)
 app.include_router(platform.router)
@@ -0,0 +1,181 @@
+"""Migrações idempotentes, rodadas no startup logo depois do create_all.
+
+O projeto não usa Alembic: o create_all só cria tabelas novas, então o que muda
+em tabela existente (índices, colunas) entra aqui. Cada passo confere o estado do
+banco antes de mexer, e o que já rodou fica registrado em schema_migrations.
+
+Passos destrutivos (CONTRACT_MIGRATIONS) não rodam no startup do Postgres: só depois
+que todos os workers já estão no código novo (deploy seguinte, MIGRATIONS_CONTRACT=true
+ou manualmente).
+
+Uso manual (a partir de Backend/):
+    python -m app.migrations [--contract]
+"""
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.finance_rollup import rebuild_rollup
+from app.core.money import to_cents
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.finance_rollup import FinanceDailyRollup
+from app.models.patient import Patient
+from app.models.session_note import SessionNote
+
+
+def _composite_indexes(conn: Connection) -> None:
+    # índices declarados nos models que ainda não existem no banco
+    for model in (Appointment, Expense, Patient, SessionNote):
+        for index in model.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+BACKFILL_BATCH = 5000
+
+
+def _backfill_cents(conn: Connection, table: str, old: str, new: str, only_zero: bool = False) -> int:
+    # ✅ em Python com o mesmo to_cents da API (Decimal, meio centavo pra cima): ROUND(x*100)
+    # em float binário erra a borda (0.285 → 28 no SQL, 29 na API). Lê em lotes por id.
+    extra = f" AND {new} = 0" if only_zero else ""
+    select_batch = text(
+        f"SELECT id, {old} FROM {table} WHERE id > :last AND {old} IS NOT NULL{extra} ORDER BY id LIMIT :n"
+    )
+    update_row = text(f"UPDATE {table} SET {new} = :cents WHERE id = :id")
+
+    total, last = 0, 0
+    while rows := conn.execute(select_batch, {"last": last, "n": BACKFILL_BATCH}).all():
+        conn.execute(update_row, [{"id": r[0], "cents": to_cents(r[1])} for r in rows])
+        total += len(rows)
+        last = rows[-1][0]
+    return total
+
+
+def _float_to_cents(conn: Connection, table: str, old: str, new: str) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if old not in columns:
+        return
+    if new not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {new} BIGINT NOT NULL DEFAULT 0"))
+    _backfill_cents(conn, table, old, new)
+    if conn.dialect.name == "postgresql":
+        # a coluna antiga fica até o contract; o código novo não escreve nela
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {old} DROP NOT NULL"))
+
+
+def _money_cents(conn: Connection) -> None:
+    # ✅ price/amount (Float, reais) → price_cents/amount_cents (inteiro, centavos)
+    _float_to_cents(conn, "appointments", "price", "price_cents")
+    _float_to_cents(conn, "expenses", "amount", "amount_cents")
+
+    # rollup antigo (em reais): recria em centavos e recalcula das tabelas brutas
+    columns = {c["name"] for c in inspect(conn).get_columns(FinanceDailyRollup.__tablename__)}
+    if "income_cents" not in columns:
+        FinanceDailyRollup.__table__.drop(bind=conn)
+        FinanceDailyRollup.__table__.create(bind=conn)
+        rebuild_rollup(Session(bind=conn))
+
+
+def _drop_float_money(conn: Connection) -> None:
+    # contract do 0002: linhas gravadas por workers antigos durante o deploy ainda têm só o float
+    backfilled = 0
+    for table, old, new in (("appointments", "price", "price_cents"), ("expenses", "amount", "amount_cents")):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if old not in columns:
+            continue
+        backfilled += _backfill_cents(conn, table, old, new, only_zero=True)
+        # SQLite >= 3.35 e Postgres suportam DROP COLUMN
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {old}"))
+    if backfilled:
+        rebuild_rollup(Session(bind=conn))
+
+
+def _unique_taken_slot(conn: Connection) -> None:
+    # ✅ no máximo 1 consulta ocupada por horário: é o que decide a corrida no /book virtual
+    stmt = text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_appointments_tenant_start_taken "
+        "ON appointments (tenant_id, start_at) WHERE status IN ('booked', 'done', 'no_show')"
+    )
+    try:
+        with conn.begin_nested():
+            conn.execute(stmt)
+    except IntegrityError:
+        # dados antigos com duas consultas no mesmo início: o índice fica pra depois da limpeza
+        print("⚠️ ux_appointments_tenant_start_taken não criado: há consultas duplicadas no mesmo horário")
+        return False
+
+
+MIGRATIONS = [
+    ("0001_composite_indexes", _composite_indexes),
+    ("0002_money_cents", _money_cents),
+    ("0003_unique_taken_slot", _unique_taken_slot),
+]
+
+
+# só depois que nenhum worker roda mais o código antigo
+CONTRACT_MIGRATIONS = [
+    ("0005_drop_float_money", _drop_float_money),
+]
+
+MIGRATIONS_LOCK_KEY = 16  # pg_advisory_lock: um worker migra por vez
+
+
+def _apply(conn: Connection, steps) -> list[str]:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    ))
+    conn.commit()
+    applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+    conn.commit()
+
+    done = []
+    for name, step in steps:
+        if name in applied:
+            continue
+        with conn.begin():
+            # insert primeiro: se outro processo já aplicou (ou está aplicando), a PK barra
+            try:
+                with conn.begin_nested():
+                    conn.execute(
+                        text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :at)"),
+                        {"name": name, "at": datetime.utcnow()},
+                    )
+            except IntegrityError:
+                continue
+            if step(conn) is False:
+                # passo adiado (ex.: dados precisam de limpeza): tenta de novo no próximo startup
+                conn.execute(text("DELETE FROM schema_migrations WHERE name = :name"), {"name": name})
+            else:
+                done.append(name)
+    return done
+
+
+def run_migrations(engine: Engine, contract: bool = False) -> list[str]:
+    steps = MIGRATIONS + (CONTRACT_MIGRATIONS if contract else [])
+    with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            # rolling deploy: vários workers sobem juntos, só um migra por vez
+            conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": MIGRATIONS_LOCK_KEY})
+            conn.commit()
+        try:
+            return _apply(conn, steps)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": MIGRATIONS_LOCK_KEY})
+                conn.commit()
+
+
+if __name__ == "__main__":
+    from app.database import engine
+    from app.models import (  # noqa: F401  (registra todos os models/FKs)
+        user, tenant, platform_admin, auth_revocation,
+    )
+
+    done = run_migrations(engine, contract="--contract" in sys.argv)
+    print("✅ migrações aplicadas:", ", ".join(done) or "nenhuma pendente")
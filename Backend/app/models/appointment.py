@@ -1,13 +1,32 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Float
+from sqlalchemy import BigInteger, String, Integer, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.money import from_cents, to_cents
 from app.database import Base
 
 
 class Appointment(Base):
     __tablename__ = "appointments"
 
+    # ✅ índices no formato das queries quentes (todas filtram por tenant primeiro)
+    __table_args__ = (
+        # /range e agregados por período
+        Index("ix_appointments_tenant_start", "tenant_id", "start_at"),
+        # /available e finance_summary (status + período)
+        Index("ix_appointments_tenant_status_start", "tenant_id", "status", "start_at"),
+        # /mine
+        Index("ix_appointments_tenant_patient_start", "tenant_id", "patient_user_id", "start_at"),
+        # parcial: só os horários livres (a maior parte da tabela em agendas abertas)
+        Index(
+            "ix_appointments_available_start",
+            "tenant_id",
+            "start_at",
+            postgresql_where=text("status = 'available'"),
+            sqlite_where=text("status = 'available'"),
+        ),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
     # ✅ Multi-tenant (ESSENCIAL)
@@ -24,9 +43,18 @@ class Appointment(Base):
     status: Mapped[str] = mapped_column(String, default="available")
     # available | booked | done | canceled | no_show
 
-    price: Mapped[float] = mapped_column(Float, default=0.0)
+    # ✅ centavos (inteiro); `price` em reais fica só como propriedade para os schemas
+    price_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
 
     patient_user_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=True
     )
-    patient_user = relationship("User")
\ No newline at end of file
+    patient_user = relationship("User")
+
+    @property
+    def price(self) -> float:
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value) -> None:
+        self.price_cents = to_cents(value)
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class AuthRevocation(Base):
+    __tablename__ = "auth_revocations"
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "user_id", name="uq_auth_revocations_tenant_user"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    tenant_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # 0 = vale para o tenant inteiro
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # só cresce (unix, segundos, ou +1 no mesmo segundo); token com `rev` menor é recusado
+    # (token antigo sem `rev`: iat anterior ao epoch)
+    epoch: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,38 @@
+from datetime import datetime, time
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, Time
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.money import from_cents
+from app.database import Base
+
+
+class AvailabilityTemplate(Base):
+    """Janela semanal de atendimento (ex.: toda segunda 08:00–12:00, sessões de 50 min)."""
+
+    __tablename__ = "availability_templates"
+
+    __table_args__ = (
+        Index("ix_availability_templates_tenant_weekday", "tenant_id", "weekday"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    tenant_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    weekday: Mapped[int] = mapped_column(Integer, nullable=False)  # 0 = segunda ... 6 = domingo
+    start_time: Mapped[time] = mapped_column(Time, nullable=False)
+    end_time: Mapped[time] = mapped_column(Time, nullable=False)
+    duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    price_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    @property
+    def price(self) -> float:
+        return from_cents(self.price_cents)
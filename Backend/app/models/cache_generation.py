@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CacheGeneration(Base):
+    """Geração do cache de respostas por tenant (ver app.core.response_cache).
+
+    Tabela própria, fora de `tenants`: o bump roda depois do commit da escrita, num
+    upsert curto, sem segurar lock de linha do tenant durante a transação de ninguém.
+    """
+
+    __tablename__ = "cache_generations"
+
+    tenant_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -1,15 +1,28 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Text, ForeignKey, Index
 from datetime import datetime
+from app.core.money import from_cents, to_cents
 from app.database import Base
 
 class Expense(Base):
     __tablename__ = "expenses"
 
+    __table_args__ = (
+        Index("ix_expenses_tenant_spent", "tenant_id", "spent_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
 
     title = Column(String(200), nullable=False)
-    amount = Column(Float, nullable=False, default=0.0)
+    amount_cents = Column(BigInteger, nullable=False, default=0)  # centavos
     spent_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    notes = Column(Text, nullable=True)
\ No newline at end of file
+    notes = Column(Text, nullable=True)
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value) -> None:
+        self.amount_cents = to_cents(value)
\ No newline at end of file
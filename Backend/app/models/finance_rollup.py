@@ -0,0 +1,28 @@
+from datetime import date
+from sqlalchemy import BigInteger, Integer, Date, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class FinanceDailyRollup(Base):
+    """Agregado financeiro por (tenant, dia), mantido incrementalmente pelas rotas de escrita."""
+
+    __tablename__ = "finance_daily_rollup"
+
+    tenant_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # centavos
+    income_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    expense_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    count_available: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    count_booked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    count_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    count_canceled: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    count_no_show: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Patient(Base):
     __tablename__ = "patients"
 
+    __table_args__ = (
+        Index("ix_patients_tenant_user", "tenant_id", "user_id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Date, Index
 from datetime import datetime
 from app.database import Base
 
 class SessionNote(Base):
     __tablename__ = "session_notes"
 
+    __table_args__ = (
+        Index("ix_session_notes_tenant_patient_date", "tenant_id", "patient_id", "session_date"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
@@ -1,19 +1,29 @@
+import base64
 from datetime import datetime, date, timedelta
-from typing import Optional
+from typing import Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import and_, func, literal, or_, select, union_all
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_read_db
 from app.models.appointment import Appointment
 from app.models.expense import Expense
-from app.schemas.admin import FinanceSummaryOut, ExpenseIn, ExpenseOut
-from app.deps import get_current_user, require_admin
+from app.models.patient import Patient
+from app.schemas.admin import FinanceSeriesOut, FinanceSummaryOut, ExpenseIn, ExpenseOut
+from app.schemas.finance import PatientTotal
+from app.deps import Principal, get_current_user, require_admin
+from app.core.finance_rollup import COUNTERS, STATUSES, as_date, read_rollup, record_expense
+from app.core.money import from_cents, to_cents
+from app.core.response_cache import bump_generation, cached_json
+from app.settings import settings
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+EXPENSES_PAGE_SIZE = 200  # página padrão quando vem só o cursor
 
+
+# ✅ todos os períodos são meio-abertos: [start, end)
 def _parse_month(month: str) -> tuple[datetime, datetime]:
     try:
         start = datetime.strptime(month + "-01", "%Y-%m-%d")
@@ -36,26 +46,125 @@ def _parse_day(day: str) -> tuple[datetime, datetime]:
     return start, end
 
 
-def _parse_range(date_from: str, date_to: str) -> tuple[datetime, datetime]:
+def _parse_range(date_from: Optional[str], date_to: Optional[str]) -> tuple[Optional[datetime], Optional[datetime]]:
+    """Limite ausente vira None (intervalo aberto daquele lado)."""
     try:
-        d1 = datetime.strptime(date_from, "%Y-%m-%d").date()
-        d2 = datetime.strptime(date_to, "%Y-%m-%d").date()
+        d1 = datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None
+        d2 = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None
     except ValueError:
         raise HTTPException(status_code=400, detail="date_from/date_to deve ser YYYY-MM-DD")
 
-    start = datetime.combine(d1, datetime.min.time())
-    end = datetime.combine(d2, datetime.max.time())  # 23:59:59.999999
+    start = datetime.combine(d1, datetime.min.time()) if d1 else None
+    end = datetime.combine(d2, datetime.min.time()) + timedelta(days=1) if d2 else None  # date_to inclusivo
     return start, end
 
 
+Granularity = Literal["day", "week", "month"]
+
+
+def _bucket_start(d: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())  # segunda-feira
+    if granularity == "month":
+        return d.replace(day=1)
+    return d
+
+
+def _next_bucket(d: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return d + timedelta(days=7)
+    if granularity == "month":
+        return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+    return d + timedelta(days=1)
+
+
+def _bucket_series(
+    start: date,
+    end: date,
+    cents_by_day: dict[date, int],
+    granularity: Granularity,
+) -> list[dict[str, Any]]:
+    # ✅ O(buckets + dias com valor): zera os buckets do período e soma cada dia uma vez só
+    buckets: dict[date, int] = {}
+    cur = _bucket_start(start, granularity)
+    while cur < end:
+        buckets[cur] = 0
+        cur = _next_bucket(cur, granularity)
+
+    for d, cents in cents_by_day.items():
+        key = _bucket_start(d, granularity)
+        if key in buckets:
+            buckets[key] += cents
+
+    return [{"day": k.strftime("%Y-%m-%d"), "income": from_cents(v)} for k, v in buckets.items()]
+
+
+# (receita, despesas, contagem por status, receita por dia) — valores em centavos
+FinanceTotals = tuple[int, int, dict[str, int], dict[date, int]]
+
+
+def _totals_from_tables(db: Session, tenant_id: int, start: datetime, end: datetime) -> FinanceTotals:
+    in_period = (
+        Appointment.tenant_id == tenant_id,
+        Appointment.start_at >= start,
+        Appointment.start_at < end,
+    )
+    is_done = Appointment.status == "done"
+
+    # ✅ round-trip 1: totais + contagem por status + despesas, tudo em escalares
+    expense_total_sq = (
+        select(func.coalesce(func.sum(Expense.amount_cents), 0))
+        .where(
+            Expense.tenant_id == tenant_id,
+            Expense.spent_at >= start,
+            Expense.spent_at < end,
+        )
+        .scalar_subquery()
+    )
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(Appointment.price_cents).filter(is_done), 0).label("income"),
+            expense_total_sq.label("expense_total"),
+            *[func.count().filter(Appointment.status == st).label(st) for st in STATUSES],
+        ).where(*in_period)
+    ).one()
+
+    # ✅ round-trip 2: receita por dia (só os dias com consulta realizada)
+    day_col = func.date(Appointment.start_at)
+    income_by_day = {
+        as_date(row.day): int(row.income or 0)
+        for row in db.execute(
+            select(day_col.label("day"), func.sum(Appointment.price_cents).label("income"))
+            .where(*in_period, is_done)
+            .group_by(day_col)
+        )
+    }
+
+    status_counts = {st: int(getattr(totals, st) or 0) for st in STATUSES}
+    return int(totals.income or 0), int(totals.expense_total or 0), status_counts, income_by_day
+
+
+def _totals_from_rollup(db: Session, tenant_id: int, start: datetime, end: datetime) -> FinanceTotals:
+    # ✅ 1 round-trip, O(dias): lê o finance_daily_rollup em vez de varrer appointments/expenses
+    rows = read_rollup(db, tenant_id, start.date(), end.date())
+
+    income = sum(r.income_cents for r in rows)
+    expense_total = sum(r.expense_cents for r in rows)
+    status_counts = {st: sum(getattr(r, f"count_{st}") for r in rows) for st in STATUSES}
+    income_by_day = {r.day: r.income_cents for r in rows if r.income_cents}
+    return income, expense_total, status_counts, income_by_day
+
+
 @router.get("/finance/summary", response_model=FinanceSummaryOut)
 def finance_summary(
+    request: Request,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     month: Optional[str] = None,
     day: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    granularity: Granularity = "day",
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -70,96 +179,298 @@ def finance_summary(
         start, end = _parse_month(month)
         period = month
 
-    done_appts = (
-        db.query(Appointment)
-        .filter(
-            Appointment.tenant_id == current_user.tenant_id,
-            Appointment.status == "done",
+    def compute():
+        if settings.FINANCE_ROLLUP_ENABLED:
+            income, expense_total, status_counts, income_by_day = _totals_from_rollup(
+                db, current_user.tenant_id, start, end
+            )
+        else:
+            income, expense_total, status_counts, income_by_day = _totals_from_tables(
+                db, current_user.tenant_id, start, end
+            )
+
+        daily_income = _bucket_series(start.date(), end.date(), income_by_day, granularity)
+
+        cash = income - expense_total
+
+        return FinanceSummaryOut(
+            period=period,
+            income_total=from_cents(income),
+            expense_total=from_cents(expense_total),
+            cash_total=from_cents(cash),
+            status_counts=status_counts,
+            daily_income=daily_income,
+            granularity=granularity,
+        )
+
+    # ✅ cache por (tenant, período normalizado), invalidado pelas escritas; ETag → 304
+    key = ("finance_summary", period, start, end, granularity)
+    return cached_json(request, db, current_user.tenant_id, key, compute)
+
+
+SeriesPeriod = Literal["week", "month"]
+
+
+def _daily_from_tables(db: Session, tenant_id: int, start: datetime, end: datetime):
+    # ✅ 1 round-trip: agregados diários de appointments e expenses num UNION ALL
+    appt_day = func.date(Appointment.start_at)
+    appt_q = (
+        select(
+            appt_day.label("day"),
+            func.coalesce(func.sum(Appointment.price_cents).filter(Appointment.status == "done"), 0).label("income_cents"),
+            literal(0).label("expense_cents"),
+            *[func.count().filter(Appointment.status == st).label(f"count_{st}") for st in STATUSES],
+        )
+        .where(
+            Appointment.tenant_id == tenant_id,
             Appointment.start_at >= start,
-            Appointment.start_at <= end,
+            Appointment.start_at < end,
         )
-        .all()
+        .group_by(appt_day)
     )
-    income = float(sum((a.price or 0) for a in done_appts))
 
-    expenses = (
-        db.query(Expense)
-        .filter(
-            Expense.tenant_id == current_user.tenant_id,
+    exp_day = func.date(Expense.spent_at)
+    exp_q = (
+        select(
+            exp_day.label("day"),
+            literal(0).label("income_cents"),
+            func.coalesce(func.sum(Expense.amount_cents), 0).label("expense_cents"),
+            *[literal(0).label(c) for c in COUNTERS],
+        )
+        .where(
+            Expense.tenant_id == tenant_id,
             Expense.spent_at >= start,
-            Expense.spent_at <= end,
+            Expense.spent_at < end,
         )
-        .order_by(Expense.spent_at.desc())
-        .all()
+        .group_by(exp_day)
     )
-    expense_total = float(sum((e.amount or 0) for e in expenses))
-
-    cash = income - expense_total
-
-    daily_income = []
-    days_span = (end.date() - start.date()).days
-    if days_span >= 1:
-        cur = datetime.combine(start.date(), datetime.min.time())
-        last = datetime.combine(end.date(), datetime.min.time()) + timedelta(days=1)
-
-        while cur < last:
-            nxt = cur + timedelta(days=1)
-            day_sum = 0.0
-            for a in done_appts:
-                if a.start_at >= cur and a.start_at < nxt:
-                    day_sum += float(a.price or 0)
-            daily_income.append({"day": cur.strftime("%Y-%m-%d"), "income": round(day_sum, 2)})
-            cur = nxt
-
-    status_counts = {"available": 0, "booked": 0, "done": 0, "canceled": 0, "no_show": 0}
-    appts_all = (
-        db.query(Appointment)
-        .filter(
-            Appointment.tenant_id == current_user.tenant_id,
-            Appointment.start_at >= start,
-            Appointment.start_at <= end,
+
+    return db.execute(union_all(appt_q, exp_q)).all()
+
+
+@router.get("/finance/series", response_model=FinanceSeriesOut)
+def finance_series(
+    request: Request,
+    period: SeriesPeriod = "month",
+    count: int = Query(default=12, ge=1, le=120),
+    end: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """N períodos consecutivos terminando no período que contém `end` (YYYY-MM-DD; padrão hoje)."""
+    require_admin(current_user)
+
+    if end:
+        last_day = _parse_day(end)[0].date()
+    else:
+        last_day = datetime.utcnow().date()
+
+    # períodos de trás pra frente a partir do que contém `end`
+    last_start = _bucket_start(last_day, period)
+    starts = [last_start]
+    for _ in range(count - 1):
+        starts.append(_bucket_start(starts[-1] - timedelta(days=1), period))
+    starts.reverse()
+
+    start = datetime.combine(starts[0], datetime.min.time())
+    stop = datetime.combine(_next_bucket(last_start, period), datetime.min.time())
+
+    def compute():
+        if settings.FINANCE_ROLLUP_ENABLED:
+            rows = read_rollup(db, current_user.tenant_id, start.date(), stop.date())
+        else:
+            rows = _daily_from_tables(db, current_user.tenant_id, start, stop)
+
+        # ✅ uma passada pelas linhas diárias, somando no índice do período
+        index = {s: i for i, s in enumerate(starts)}
+        income = [0] * count
+        expense = [0] * count
+        status_counts = {st: [0] * count for st in STATUSES}
+        for r in rows:
+            i = index[_bucket_start(as_date(r.day), period)]
+            income[i] += int(r.income_cents or 0)
+            expense[i] += int(r.expense_cents or 0)
+            for st in STATUSES:
+                status_counts[st][i] += int(getattr(r, f"count_{st}") or 0)
+
+        return FinanceSeriesOut(
+            granularity=period,
+            periods=[s.strftime("%Y-%m-%d") for s in starts],
+            income=[from_cents(v) for v in income],
+            expense=[from_cents(v) for v in expense],
+            cash=[from_cents(i - e) for i, e in zip(income, expense)],
+            status_counts=status_counts,
         )
-        .all()
-    )
-    for a in appts_all:
-        if a.status in status_counts:
-            status_counts[a.status] += 1
-
-    return {
-        "period": period,
-        "income_total": round(income, 2),
-        "expense_total": round(expense_total, 2),
-        "cash_total": round(cash, 2),
-        "status_counts": status_counts,
-        "daily_income": daily_income,
-    }
+
+    key = ("finance_series", period, count, start)
+    return cached_json(request, db, current_user.tenant_id, key, compute)
+
+
+PatientOrder = Literal["total", "visits", "last_visit"]
+
+
+@router.get("/finance/by-patient", response_model=list[PatientTotal])
+def finance_by_patient(
+    request: Request,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    order: PatientOrder = "total",
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Receita e comparecimento por paciente (top-N por `order`, paginado com limit/offset)."""
+    require_admin(current_user)
+
+    period = _parse_range(date_from, date_to) if date_from and date_to else None
+
+    def compute():
+        # ✅ 1 GROUP BY no banco em vez de baixar todas as consultas pro front
+        total = func.coalesce(func.sum(Appointment.price_cents).filter(Appointment.status == "done"), 0)
+        done_count = func.count().filter(Appointment.status == "done")
+        last_visit = func.max(Appointment.start_at).filter(Appointment.status == "done")
+        order_by = {
+            "total": total.desc(),
+            "visits": done_count.desc(),
+            "last_visit": last_visit.desc().nulls_last(),
+        }[order]
+
+        stmt = (
+            select(
+                Patient.id.label("patient_id"),
+                Patient.full_name.label("patient_name"),
+                total.label("total"),
+                done_count.label("done_count"),
+                func.count().filter(Appointment.status == "no_show").label("no_show_count"),
+                func.count().filter(Appointment.status == "canceled").label("canceled_count"),
+                last_visit.label("last_visit"),
+            )
+            .join(
+                Patient,
+                (Patient.user_id == Appointment.patient_user_id) & (Patient.tenant_id == Appointment.tenant_id),
+            )
+            .where(Appointment.tenant_id == current_user.tenant_id)
+            .group_by(Patient.id, Patient.full_name)
+            .order_by(order_by, Patient.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        if period:
+            stmt = stmt.where(Appointment.start_at >= period[0], Appointment.start_at < period[1])
+
+        return [
+            PatientTotal(
+                patient_id=r.patient_id,
+                patient_name=r.patient_name,
+                total=from_cents(r.total),
+                done_count=r.done_count,
+                no_show_count=r.no_show_count,
+                canceled_count=r.canceled_count,
+                last_visit=r.last_visit.date() if r.last_visit else None,
+            )
+            for r in db.execute(stmt)
+        ]
+
+    key = ("finance_by_patient", period, order, limit, offset)
+    return cached_json(request, db, current_user.tenant_id, key, compute)
+
+
+def _encode_cursor(spent_at: datetime, expense_id: int) -> str:
+    raw = f"{spent_at.isoformat()}|{expense_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        spent_at, expense_id = raw.split("|")
+        return datetime.fromisoformat(spent_at), int(expense_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor inválido")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 @router.get("/expenses", response_model=list[ExpenseOut])
 def list_expenses(
-    month: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    month: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
+    """Despesas mais recentes primeiro; com limit/cursor, a próxima página vem no header X-Next-Cursor.
+
+    Sem limit nem cursor devolve tudo (contrato antigo, que o front ainda usa por mês).
+    """
     require_admin(current_user)
-    start, end = _parse_month(month)
-    return (
-        db.query(Expense)
-        .filter(
-            Expense.tenant_id == current_user.tenant_id,
-            Expense.spent_at >= start,
-            Expense.spent_at < end,
+
+    page_size = limit or (EXPENSES_PAGE_SIZE if cursor else None)
+
+    filters = [Expense.tenant_id == current_user.tenant_id]
+    # ✅ date_from/date_to valem sozinhos (intervalo aberto do outro lado); month só sem nenhum dos dois
+    if date_from or date_to:
+        start, end = _parse_range(date_from, date_to)
+    elif month:
+        start, end = _parse_month(month)
+    else:
+        start = end = None
+    if start is not None:
+        filters.append(Expense.spent_at >= start)
+    if end is not None:
+        filters.append(Expense.spent_at < end)
+    if min_amount is not None:
+        filters.append(Expense.amount_cents >= to_cents(min_amount))
+    if max_amount is not None:
+        filters.append(Expense.amount_cents <= to_cents(max_amount))
+    if q:
+        filters.append(Expense.title.ilike(_escape_like(q.strip()) + "%", escape="\\"))
+
+    # ✅ keyset em (spent_at, id) desc: a página N custa o mesmo que a primeira (sem OFFSET)
+    if cursor:
+        c_spent_at, c_id = _decode_cursor(cursor)
+        filters.append(
+            or_(
+                Expense.spent_at < c_spent_at,
+                and_(Expense.spent_at == c_spent_at, Expense.id < c_id),
+            )
         )
-        .order_by(Expense.spent_at.desc())
-        .all()
-    )
+
+    next_cursor = None
+
+    def compute():
+        nonlocal next_cursor
+        query = db.query(Expense).filter(*filters).order_by(Expense.spent_at.desc(), Expense.id.desc())
+        if page_size is None:
+            return [ExpenseOut.model_validate(e) for e in query.all()]
+
+        rows = query.limit(page_size + 1).all()
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = _encode_cursor(rows[-1].spent_at, rows[-1].id)
+        return [ExpenseOut.model_validate(e) for e in rows]
+
+    def headers(_):
+        return {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+    key = ("expenses", start, end, min_amount, max_amount, q, cursor, page_size)
+    return cached_json(request, db, current_user.tenant_id, key, compute, headers)
 
 
 @router.post("/expenses", response_model=ExpenseOut)
 def create_expense(
     data: ExpenseIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -170,12 +481,14 @@ def create_expense(
     e = Expense(
         tenant_id=current_user.tenant_id,
         title=data.title,
-        amount=float(data.amount),
+        amount_cents=to_cents(data.amount),
         spent_at=spent_at,
         notes=data.notes,
     )
     db.add(e)
+    record_expense(db, current_user.tenant_id, spent_at, e.amount_cents)
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     db.refresh(e)
     return e
 
@@ -184,7 +497,7 @@ def create_expense(
 def delete_expense(
     expense_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
     e = (
@@ -197,6 +510,8 @@ def delete_expense(
     )
     if not e:
         raise HTTPException(status_code=404, detail="Despesa não encontrada")
+    record_expense(db, current_user.tenant_id, e.spent_at, -(e.amount_cents or 0))
     db.delete(e)
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     return {"ok": True}
\ No newline at end of file
@@ -1,17 +1,41 @@
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.appointment import Appointment
-from app.models.user import User
 from app.models.patient import Patient
-from app.schemas.appointment import AppointmentOut, BookIn, CancelIn, BulkGenerateIn, SetStatusIn
-from app.deps import get_current_user, require_admin
+from app.schemas.appointment import (
+    AppointmentOut,
+    BookIn,
+    CancelIn,
+    CancelBatchIn,
+    BulkGenerateIn,
+    SetStatusIn,
+    SetStatusBatchIn,
+)
+from app.deps import Principal, get_current_user, require_admin
+from app.core.availability import (
+    claim_virtual_slot,
+    day_slots,
+    insert_missing_slots,
+    list_virtual,
+    virtual_mode,
+    virtual_start,
+)
+from app.core.booking import book_slot
+from app.core.finance_rollup import record_appointment_changes
+from app.core.money import to_cents
+from app.core.response_cache import bump_generation
+from app.settings import settings
 
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
 
+MAX_BULK_DAYS = 92
+
 
 def _as_out(appt: Appointment, patient: Patient | None):
     out = AppointmentOut.model_validate(appt)
@@ -21,12 +45,33 @@ def _as_out(appt: Appointment, patient: Patient | None):
     return out
 
 
+def _with_virtual(persisted: list[AppointmentOut], virtual: list[dict]) -> list[AppointmentOut]:
+    # intercala as linhas reais com os slots virtuais, por horário
+    if not virtual:
+        return persisted
+    merged = persisted + [AppointmentOut.model_validate(v) for v in virtual]
+    return sorted(merged, key=lambda a: a.start_at)
+
+
+def _patient_for(db: Session, tenant_id: int, user_id: int | None) -> Patient | None:
+    if not user_id:
+        return None
+    return (
+        db.query(Patient)
+        .filter(
+            Patient.tenant_id == tenant_id,
+            Patient.user_id == user_id,
+        )
+        .first()
+    )
+
+
 @router.get("/range", response_model=list[AppointmentOut])
 def range_list(
     date_from: str,
     date_to: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     try:
         d1 = datetime.strptime(date_from, "%Y-%m-%d")
@@ -64,11 +109,14 @@ def range_list(
         )
         patients_map = {p.user_id: p for p in pts}
 
-    return [_as_out(a, patients_map.get(a.patient_user_id)) for a in appts]
+    out = [_as_out(a, patients_map.get(a.patient_user_id)) for a in appts]
+    if current_user.role == "admin" and virtual_mode():
+        out = _with_virtual(out, list_virtual(db, current_user.tenant_id, start, end + timedelta(seconds=1)))
+    return out
 
 
 @router.get("/available", response_model=list[AppointmentOut])
-def available(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def available(db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     now = datetime.utcnow()
 
     appts = (
@@ -81,11 +129,15 @@ def available(db: Session = Depends(get_db), current_user: User = Depends(get_cu
         .order_by(Appointment.start_at.asc())
         .all()
     )
-    return [AppointmentOut.model_validate(a) for a in appts]
+    out = [AppointmentOut.model_validate(a) for a in appts]
+    if virtual_mode():
+        horizon = now + timedelta(days=settings.AVAILABILITY_VIRTUAL_DAYS)
+        out = _with_virtual(out, list_virtual(db, current_user.tenant_id, now, horizon))
+    return out
 
 
 @router.get("/mine", response_model=list[AppointmentOut])
-def mine(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def mine(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if current_user.role != "patient":
         raise HTTPException(status_code=403, detail="Apenas paciente")
 
@@ -102,51 +154,37 @@ def mine(db: Session = Depends(get_db), current_user: User = Depends(get_current
 
 
 @router.post("/book", response_model=AppointmentOut)
-def book(data: BookIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def book(data: BookIn, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if current_user.role != "patient":
         raise HTTPException(status_code=403, detail="Apenas paciente")
 
-    appt = (
-        db.query(Appointment)
-        .filter(
-            Appointment.id == data.appointment_id,
-            Appointment.tenant_id == current_user.tenant_id,
-        )
-        .first()
-    )
-    if not appt:
-        raise HTTPException(status_code=404, detail="Consulta não encontrada")
-    if appt.status != "available":
-        raise HTTPException(status_code=400, detail="Horário indisponível")
-
-    # ✅ trava: não deixa agendar passado
-    if appt.start_at < datetime.utcnow():
-        raise HTTPException(status_code=400, detail="Não é possível agendar um horário no passado")
-
-    appt.status = "booked"
-    appt.patient_user_id = current_user.id
-    db.commit()
-    db.refresh(appt)
+    # ✅ slot virtual (id negativo): vira linha booked na hora, protegido pelo índice único
+    if data.appointment_id < 0 and virtual_mode():
+        if virtual_start(data.appointment_id) < datetime.utcnow():
+            raise HTTPException(status_code=400, detail="Não é possível agendar um horário no passado")
+        appt = claim_virtual_slot(db, current_user.tenant_id, data.appointment_id, "booked", current_user.id)
+        return _as_out(appt, _patient_for(db, current_user.tenant_id, current_user.id))
 
-    patient = (
-        db.query(Patient)
-        .filter(
-            Patient.tenant_id == current_user.tenant_id,
-            Patient.user_id == appt.patient_user_id,
-        )
-        .first()
-    )
-    return _as_out(appt, patient)
+    # ✅ UPDATE condicional atômico (livre + futuro no WHERE): sem corrida entre dois pacientes
+    appt = book_slot(db, current_user.tenant_id, data.appointment_id, current_user.id)
+    return _as_out(appt, _patient_for(db, current_user.tenant_id, current_user.id))
 
 
 @router.post("/cancel", response_model=AppointmentOut)
-def cancel(data: CancelIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def cancel(data: CancelIn, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    # admin cancelando slot virtual = bloquear o horário (grava linha canceled sem paciente)
+    if data.appointment_id < 0 and virtual_mode() and current_user.role == "admin":
+        return _as_out(claim_virtual_slot(db, current_user.tenant_id, data.appointment_id, "canceled", None), None)
+
+    # FOR UPDATE: duas transições simultâneas não podem partir do mesmo status antigo
+    # (o delta do rollup sairia em dobro)
     appt = (
         db.query(Appointment)
         .filter(
             Appointment.id == data.appointment_id,
             Appointment.tenant_id == current_user.tenant_id,
         )
+        .with_for_update()
         .first()
     )
     if not appt:
@@ -162,8 +200,11 @@ def cancel(data: CancelIn, db: Session = Depends(get_db), current_user: User = D
         if appt.status not in ("booked", "available"):
             raise HTTPException(status_code=400, detail="Status inválido para cancelamento")
 
+    old_status = appt.status
     appt.status = "canceled"
+    record_appointment_changes(db, current_user.tenant_id, [(appt.start_at, appt.price_cents, old_status, "canceled")])
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     db.refresh(appt)
 
     patient = None
@@ -180,15 +221,21 @@ def cancel(data: CancelIn, db: Session = Depends(get_db), current_user: User = D
 
 
 @router.post("/set-status", response_model=AppointmentOut)
-def set_status(data: SetStatusIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def set_status(data: SetStatusIn, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     require_admin(current_user)
 
+    if data.appointment_id < 0 and virtual_mode():
+        if data.status != "canceled":
+            raise HTTPException(status_code=400, detail="Horário virtual só pode ser bloqueado (canceled)")
+        return _as_out(claim_virtual_slot(db, current_user.tenant_id, data.appointment_id, "canceled", None), None)
+
     appt = (
         db.query(Appointment)
         .filter(
             Appointment.id == data.appointment_id,
             Appointment.tenant_id == current_user.tenant_id,
         )
+        .with_for_update()
         .first()
     )
     if not appt:
@@ -197,8 +244,15 @@ def set_status(data: SetStatusIn, db: Session = Depends(get_db), current_user: U
     if appt.status == "available" and data.status in ("done", "no_show"):
         raise HTTPException(status_code=400, detail="Não dá pra marcar done/no_show em horário disponível (sem paciente)")
 
+    old_status = appt.status
     appt.status = data.status
-    db.commit()
+    record_appointment_changes(db, current_user.tenant_id, [(appt.start_at, appt.price_cents, old_status, data.status)])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Já existe outra consulta ocupando este horário")
+    bump_generation(db, current_user.tenant_id)
     db.refresh(appt)
 
     patient = None
@@ -214,8 +268,119 @@ def set_status(data: SetStatusIn, db: Session = Depends(get_db), current_user: U
     return _as_out(appt, patient)
 
 
+def _load_for_batch(db: Session, tenant_id: int, ids: list[int]) -> dict[int, Appointment]:
+    if any(i < 0 for i in ids):
+        raise HTTPException(status_code=400, detail="Horários virtuais não são aceitos em lote")
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="appointment_id repetido no lote")
+
+    # ✅ 1 SELECT (com lock de linha no Postgres) para validar o lote inteiro
+    appts = {
+        a.id: a
+        for a in db.execute(
+            select(Appointment)
+            .where(Appointment.tenant_id == tenant_id, Appointment.id.in_(ids))
+            .with_for_update()
+        ).scalars()
+    }
+    missing = [i for i in ids if i not in appts]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Consultas não encontradas: {missing}")
+    return appts
+
+
+def _apply_batch(db: Session, tenant_id: int, appts: dict[int, Appointment], targets: dict[int, str]):
+    """Aplica {id: novo_status} com 1 UPDATE por status de destino; devolve todas as linhas do lote com paciente (1 SELECT)."""
+    by_status: dict[str, list[int]] = {}
+    for appt_id, status in targets.items():
+        by_status.setdefault(status, []).append(appt_id)
+
+    try:
+        for status, ids in by_status.items():
+            db.execute(
+                update(Appointment)
+                .where(Appointment.tenant_id == tenant_id, Appointment.id.in_(ids))
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Já existe outra consulta ocupando um desses horários")
+
+    if targets:
+        record_appointment_changes(
+            db,
+            tenant_id,
+            [(appts[i].start_at, appts[i].price_cents, appts[i].status, status) for i, status in targets.items()],
+        )
+    db.commit()
+    if targets:
+        bump_generation(db, tenant_id)
+
+    rows = db.execute(
+        select(Appointment, Patient)
+        .outerjoin(
+            Patient,
+            (Patient.user_id == Appointment.patient_user_id) & (Patient.tenant_id == Appointment.tenant_id),
+        )
+        .where(Appointment.tenant_id == tenant_id, Appointment.id.in_(list(appts)))
+        .order_by(Appointment.start_at.asc())
+    ).all()
+    return [_as_out(a, p) for a, p in rows]
+
+
+@router.post("/set-status/batch", response_model=list[AppointmentOut])
+def set_status_batch(
+    data: SetStatusBatchIn,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+
+    appts = _load_for_batch(db, current_user.tenant_id, [i.appointment_id for i in data.items])
+
+    # tudo ou nada: uma transição inválida recusa o lote inteiro
+    invalid = [
+        i.appointment_id
+        for i in data.items
+        if appts[i.appointment_id].status == "available" and i.status in ("done", "no_show")
+    ]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Não dá pra marcar done/no_show em horário disponível (sem paciente): {invalid}",
+        )
+
+    # quem já está no status pedido não entra no UPDATE (mas volta na resposta)
+    targets = {i.appointment_id: i.status for i in data.items if appts[i.appointment_id].status != i.status}
+    return _apply_batch(db, current_user.tenant_id, appts, targets)
+
+
+@router.post("/cancel/batch", response_model=list[AppointmentOut])
+def cancel_batch(
+    data: CancelBatchIn,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    appts = _load_for_batch(db, current_user.tenant_id, data.appointment_ids)
+
+    if current_user.role == "patient":
+        if any(a.patient_user_id != current_user.id for a in appts.values()):
+            raise HTTPException(status_code=403, detail="Não é sua consulta")
+        invalid = [a.id for a in appts.values() if a.status != "booked"]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Só booked pode ser cancelada pelo paciente: {invalid}")
+    elif current_user.role == "admin":
+        invalid = [a.id for a in appts.values() if a.status not in ("booked", "available")]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Status inválido para cancelamento: {invalid}")
+
+    targets = {i: "canceled" for i in data.appointment_ids if appts[i].status != "canceled"}
+    return _apply_batch(db, current_user.tenant_id, appts, targets)
+
+
 @router.post("/bulk")
-def bulk_generate(data: BulkGenerateIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def bulk_generate(data: BulkGenerateIn, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     require_admin(current_user)
 
     try:
@@ -225,39 +390,31 @@ def bulk_generate(data: BulkGenerateIn, db: Session = Depends(get_db), current_u
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato inválido. Use date=YYYY-MM-DD e time=HH:MM")
 
-    start_dt = datetime.combine(day, start_t)
-    end_dt = datetime.combine(day, end_t)
-
-    if end_dt <= start_dt:
+    if data.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="duration_minutes deve ser maior que zero")
+    if end_t <= start_t:
         raise HTTPException(status_code=400, detail="end_time deve ser maior que start_time")
 
-    created = 0
-    cur = start_dt
-    dur = timedelta(minutes=data.duration_minutes)
-
-    while cur + dur <= end_dt:
-        exists = (
-            db.query(Appointment)
-            .filter(
-                Appointment.tenant_id == current_user.tenant_id,
-                Appointment.start_at == cur,
-                Appointment.end_at == cur + dur,
-            )
-            .first()
-        )
-        if not exists:
-            db.add(
-                Appointment(
-                    tenant_id=current_user.tenant_id,
-                    start_at=cur,
-                    end_at=cur + dur,
-                    status="available",
-                    price=float(data.price),
-                    patient_user_id=None,
-                )
-            )
-            created += 1
-        cur += dur
+    last_day = day
+    if data.date_to:
+        try:
+            last_day = datetime.strptime(data.date_to, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato inválido. Use date_to=YYYY-MM-DD")
+        if last_day < day or (last_day - day).days > MAX_BULK_DAYS:
+            raise HTTPException(status_code=400, detail=f"date_to deve estar entre date e date + {MAX_BULK_DAYS} dias")
 
+    # ✅ todos os slots calculados antes: 1 SELECT da janela + 1 INSERT multi-linha
+    dur = timedelta(minutes=data.duration_minutes)
+    price_cents = to_cents(data.price)
+    slots = []
+    cur_day = day
+    while cur_day <= last_day:
+        slots += day_slots(datetime.combine(cur_day, start_t), datetime.combine(cur_day, end_t), dur, price_cents)
+        cur_day += timedelta(days=1)
+
+    created, skipped = insert_missing_slots(db, current_user.tenant_id, slots)
     db.commit()
-    return {"created": created}
\ No newline at end of file
+    if created:
+        bump_generation(db, current_user.tenant_id)
+    return {"created": created, "skipped": skipped}
\ No newline at end of file
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db, get_async_read_db
+from app.models.appointment import Appointment
+from app.models.patient import Patient
+from app.schemas.appointment import AppointmentOut
+from app.deps import Principal, get_current_user_async
+from app.core.availability import blocking_stmt, templates_stmt, virtual_as_dict, virtual_mode, virtual_slots
+from app.routes.appointments import _as_out, _with_virtual
+from app.settings import settings
+
+# ✅ variantes async das leituras da agenda (DB_ASYNC=true).
+# O main.py inclui este router ANTES do sync, então estas rotas têm precedência nos mesmos paths.
+router = APIRouter(prefix="/appointments", tags=["Appointments"])
+
+
+async def _list_virtual(db: AsyncSession, tenant_id: int, start: datetime, end: datetime) -> list[dict]:
+    templates = (await db.execute(templates_stmt(tenant_id))).scalars().all()
+    if not templates:
+        return []
+    blocked = (await db.execute(blocking_stmt(tenant_id, start, end))).tuples().all()
+    return [virtual_as_dict(s) for s in virtual_slots(templates, blocked, start, end)]
+
+
+@router.get("/range", response_model=list[AppointmentOut])
+async def range_list(
+    date_from: str,
+    date_to: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    try:
+        d1 = datetime.strptime(date_from, "%Y-%m-%d")
+        d2 = datetime.strptime(date_to, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Use date_from/date_to como YYYY-MM-DD")
+
+    start = datetime(d1.year, d1.month, d1.day, 0, 0, 0)
+    end = datetime(d2.year, d2.month, d2.day, 23, 59, 59)
+
+    stmt = select(Appointment).where(
+        Appointment.tenant_id == current_user.tenant_id,
+        Appointment.start_at >= start,
+        Appointment.start_at <= end,
+    )
+
+    if current_user.role == "patient":
+        stmt = stmt.where(Appointment.patient_user_id == current_user.id)
+
+    appts = (await db.execute(stmt.order_by(Appointment.start_at.asc()))).scalars().all()
+
+    user_ids = [a.patient_user_id for a in appts if a.patient_user_id]
+    patients_map = {}
+    if user_ids:
+        pts = (
+            await db.execute(
+                select(Patient).where(
+                    Patient.tenant_id == current_user.tenant_id,
+                    Patient.user_id.in_(user_ids),
+                )
+            )
+        ).scalars().unique().all()
+        patients_map = {p.user_id: p for p in pts}
+
+    out = [_as_out(a, patients_map.get(a.patient_user_id)) for a in appts]
+    if current_user.role == "admin" and virtual_mode():
+        out = _with_virtual(out, await _list_virtual(db, current_user.tenant_id, start, end + timedelta(seconds=1)))
+    return out
+
+
+@router.get("/available", response_model=list[AppointmentOut])
+async def available(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    now = datetime.utcnow()
+
+    appts = (
+        await db.execute(
+            select(Appointment)
+            .where(
+                Appointment.tenant_id == current_user.tenant_id,
+                Appointment.status == "available",
+                Appointment.start_at >= now,  # ✅ não mostra horários passados
+            )
+            .order_by(Appointment.start_at.asc())
+        )
+    ).scalars().all()
+    out = [AppointmentOut.model_validate(a) for a in appts]
+    if virtual_mode():
+        horizon = now + timedelta(days=settings.AVAILABILITY_VIRTUAL_DAYS)
+        out = _with_virtual(out, await _list_virtual(db, current_user.tenant_id, now, horizon))
+    return out
+
+
+@router.get("/mine", response_model=list[AppointmentOut])
+async def mine(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    if current_user.role != "patient":
+        raise HTTPException(status_code=403, detail="Apenas paciente")
+
+    appts = (
+        await db.execute(
+            select(Appointment)
+            .where(
+                Appointment.tenant_id == current_user.tenant_id,
+                Appointment.patient_user_id == current_user.id,
+            )
+            .order_by(Appointment.start_at.desc())
+        )
+    ).scalars().all()
+    return [AppointmentOut.model_validate(a) for a in appts]
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.schemas.auth import TokenOut, LoginTenantIn, RegisterTenantIn
-from app.core.security import verify_password, create_access_token, hash_password
+from app.core.security import verify_password_async, create_access_token, hash_password, password_needs_rehash
+from app.core.rehash import rehash_password
+from app.core.revocation import current_epoch, revocations
+from app.core.tenant_cache import tenant_state_of
 from app.models.user import User
 from app.models.tenant import Tenant
 
@@ -32,28 +36,49 @@ def register_tenant(payload: RegisterTenantIn, db: Session = Depends(get_db)):
     db.add(admin)
     db.commit()
 
-    token = create_access_token(subject=str(user.id), tenant_id=tenant.id, role=user.role)
-    return TokenOut(access_token=token, token_type="bearer")
+    # ✅ tenant novo entra já no snapshot do modo stateless (senão o token recém-emitido levaria 401)
+    revocations.remember_tenant(tenant_state_of(tenant))
 
+    # tenant novo: nenhum epoch de revogação ainda
+    token = create_access_token(subject=str(admin.id), tenant_id=tenant.id, role=admin.role)
+    return TokenOut(access_token=token, token_type="bearer")
 
-@router.post("/login-tenant", response_model=TokenOut)
-def login_tenant(payload: LoginTenantIn, db: Session = Depends(get_db)):
-    slug = payload.tenant_slug.strip().lower()
 
+def _find_login_user(db: Session, slug: str, email: str) -> tuple[Tenant | None, User | None]:
     tenant = db.query(Tenant).filter(Tenant.slug == slug).first()
     if not tenant:
-        raise HTTPException(status_code=401, detail="Consultório não encontrado")
+        return None, None
 
     user = db.query(User).filter(
         User.tenant_id == tenant.id,
-        User.email == payload.email.lower().strip(),
+        User.email == email,
         User.is_active == True
     ).first()
+    return tenant, user
 
-    if not user or not verify_password(payload.password, user.password_hash):
+
+@router.post("/login-tenant", response_model=TokenOut)
+async def login_tenant(
+    payload: LoginTenantIn,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    slug = payload.tenant_slug.strip().lower()
+
+    # banco no threadpool, Argon2 no pool do KDF: o event loop não fica preso em nenhum dos dois
+    tenant, user = await run_in_threadpool(_find_login_user, db, slug, payload.email.lower().strip())
+    if not tenant:
+        raise HTTPException(status_code=401, detail="Consultório não encontrado")
+
+    if not user or not await verify_password_async(payload.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
-    token = create_access_token(subject=str(admin.id), tenant_id=tenant.id, role=admin.role)
+    # ✅ upgrade transparente do hash (bcrypt legado / perfil de custo novo) sem atrasar o login
+    if password_needs_rehash(user.password_hash):
+        background_tasks.add_task(rehash_password, User, user.id, user.password_hash, payload.password)
+
+    rev = await run_in_threadpool(current_epoch, db, tenant.id, user.id)
+    token = create_access_token(subject=str(user.id), tenant_id=tenant.id, role=user.role, rev=rev)
     return TokenOut(access_token=token, token_type="bearer")
 
 
@@ -62,7 +87,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import Depends as _Depends
 
 @router.post("/login", response_model=TokenOut, include_in_schema=False)
-def login_swagger(form_data: OAuth2PasswordRequestForm = _Depends(), db: Session = Depends(get_db)):
+async def login_swagger(
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = _Depends(),
+    db: Session = Depends(get_db),
+):
     # fallback: espera username no formato slug|email
     raw = form_data.username.strip()
     if "|" not in raw:
@@ -70,4 +99,4 @@ def login_swagger(form_data: OAuth2PasswordRequestForm = _Depends(), db: Session
 
     slug, email = raw.split("|", 1)
     payload = LoginTenantIn(tenant_slug=slug, email=email, password=form_data.password)
-    return login_tenant(payload, db)
\ No newline at end of file
+    return await login_tenant(payload, background_tasks, db)
\ No newline at end of file
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.availability_template import AvailabilityTemplate
+from app.schemas.availability import (
+    AvailabilityTemplateIn,
+    AvailabilityTemplateUpdateIn,
+    AvailabilityTemplateOut,
+    MaterializeIn,
+    MaterializeOut,
+)
+from app.deps import Principal, get_current_user, require_admin
+from app.core.availability import materialize
+from app.core.money import to_cents
+from app.core.response_cache import bump_generation
+
+router = APIRouter(prefix="/availability", tags=["Availability"])
+
+MAX_MATERIALIZE_DAYS = 184  # ~6 meses por chamada
+
+
+def _get_template(db: Session, template_id: int, tenant_id: int) -> AvailabilityTemplate:
+    t = (
+        db.query(AvailabilityTemplate)
+        .filter(
+            AvailabilityTemplate.id == template_id,
+            AvailabilityTemplate.tenant_id == tenant_id,
+        )
+        .first()
+    )
+    if not t:
+        raise HTTPException(status_code=404, detail="Template não encontrado")
+    return t
+
+
+def _check_window(t: AvailabilityTemplate) -> None:
+    if t.end_time <= t.start_time:
+        raise HTTPException(status_code=400, detail="end_time deve ser maior que start_time")
+
+
+@router.get("/templates", response_model=list[AvailabilityTemplateOut])
+def list_templates(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return (
+        db.query(AvailabilityTemplate)
+        .filter(AvailabilityTemplate.tenant_id == current_user.tenant_id)
+        .order_by(AvailabilityTemplate.weekday, AvailabilityTemplate.start_time)
+        .all()
+    )
+
+
+@router.post("/templates", response_model=AvailabilityTemplateOut)
+def create_template(
+    data: AvailabilityTemplateIn,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+
+    t = AvailabilityTemplate(
+        tenant_id=current_user.tenant_id,
+        weekday=data.weekday,
+        start_time=data.start_time,
+        end_time=data.end_time,
+        duration_minutes=data.duration_minutes,
+        price_cents=to_cents(data.price),
+        is_active=data.is_active,
+    )
+    _check_window(t)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+@router.patch("/templates/{template_id}", response_model=AvailabilityTemplateOut)
+def update_template(
+    template_id: int,
+    data: AvailabilityTemplateUpdateIn,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    t = _get_template(db, template_id, current_user.tenant_id)
+
+    changes = data.model_dump(exclude_unset=True)
+    if "price" in changes:
+        t.price_cents = to_cents(changes.pop("price"))
+    for field, value in changes.items():
+        setattr(t, field, value)
+    _check_window(t)
+
+    # slots já materializados não mudam: o template vale para o que ainda não foi gerado
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+@router.delete("/templates/{template_id}")
+def delete_template(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    t = _get_template(db, template_id, current_user.tenant_id)
+    db.delete(t)
+    db.commit()
+    return {"ok": True}
+
+
+@router.post("/materialize", response_model=MaterializeOut)
+def materialize_templates(
+    data: MaterializeIn,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+
+    try:
+        d1 = datetime.strptime(data.date_from, "%Y-%m-%d").date()
+        d2 = datetime.strptime(data.date_to, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date_from/date_to deve ser YYYY-MM-DD")
+    if d2 < d1 or d2 - d1 > timedelta(days=MAX_MATERIALIZE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Período deve ter no máximo {MAX_MATERIALIZE_DAYS} dias")
+
+    # ✅ período inteiro numa transação: 1 SELECT da janela + 1 INSERT multi-linha
+    created, skipped = materialize(db, current_user.tenant_id, d1, d2)
+    db.commit()
+    if created:
+        bump_generation(db, current_user.tenant_id)
+    return {"created": created, "skipped": skipped}
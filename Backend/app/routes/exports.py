@@ -0,0 +1,208 @@
+import csv
+import io
+import os
+import tempfile
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import ReadSessionLocal
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.patient import Patient
+from app.deps import Principal, get_current_user, require_admin
+from app.core.finance_rollup import STATUSES, as_date, read_rollup
+from app.core.money import cents_to_str, from_cents
+from app.routes.admin import _daily_from_tables, _parse_range
+from app.settings import settings
+
+router = APIRouter(prefix="/admin/export", tags=["Export"])
+
+ExportKind = Literal["appointments", "expenses", "finance"]
+ExportFormat = Literal["csv", "xlsx"]
+
+YIELD_PER = 1000
+CSV_FLUSH_BYTES = 64 * 1024
+FILE_CHUNK_BYTES = 64 * 1024
+
+
+class _Money(int):
+    """Centavos marcados como dinheiro: CSV escreve "150.50", XLSX escreve número."""
+
+
+# (cabeçalho, gerador de linhas) — valores em centavos chegam como int e são formatados na saída
+Table = tuple[list[str], Iterator[list[Any]]]
+
+
+def _appointment_rows(db: Session, tenant_id: int, start: datetime, end: datetime) -> Table:
+    stmt = (
+        select(
+            Appointment.id,
+            Appointment.start_at,
+            Appointment.end_at,
+            Appointment.status,
+            Appointment.price_cents,
+            Patient.full_name,
+            Patient.email,
+        )
+        .outerjoin(
+            Patient,
+            (Patient.user_id == Appointment.patient_user_id) & (Patient.tenant_id == Appointment.tenant_id),
+        )
+        .where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.start_at >= start,
+            Appointment.start_at < end,
+        )
+        .order_by(Appointment.start_at, Appointment.id)
+        # ✅ cursor do lado do servidor: busca em lotes, nunca a lista inteira
+        .execution_options(yield_per=YIELD_PER)
+    )
+    header = ["id", "start_at", "end_at", "status", "price", "patient_name", "patient_email"]
+    return header, (
+        [r.id, r.start_at, r.end_at, r.status, _Money(r.price_cents), r.full_name, r.email]
+        for r in db.execute(stmt)
+    )
+
+
+def _expense_rows(db: Session, tenant_id: int, start: datetime, end: datetime) -> Table:
+    stmt = (
+        select(Expense.id, Expense.spent_at, Expense.title, Expense.amount_cents, Expense.notes)
+        .where(
+            Expense.tenant_id == tenant_id,
+            Expense.spent_at >= start,
+            Expense.spent_at < end,
+        )
+        .order_by(Expense.spent_at, Expense.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    header = ["id", "spent_at", "title", "amount", "notes"]
+    return header, ([r.id, r.spent_at, r.title, _Money(r.amount_cents), r.notes] for r in db.execute(stmt))
+
+
+def _finance_rows(db: Session, tenant_id: int, start: datetime, end: datetime) -> Table:
+    # uma linha por dia: já vem agregado do banco (ou do rollup), O(dias) em memória
+    if settings.FINANCE_ROLLUP_ENABLED:
+        rows = read_rollup(db, tenant_id, start.date(), end.date())
+    else:
+        rows = _daily_from_tables(db, tenant_id, start, end)
+
+    days: dict = defaultdict(lambda: defaultdict(int))
+    for r in rows:
+        day = days[as_date(r.day)]
+        day["income_cents"] += int(r.income_cents or 0)
+        day["expense_cents"] += int(r.expense_cents or 0)
+        for st in STATUSES:
+            day[st] += int(getattr(r, f"count_{st}") or 0)
+
+    header = ["day", "income", "expense", "cash", *STATUSES]
+    return header, (
+        [
+            d,
+            _Money(v["income_cents"]),
+            _Money(v["expense_cents"]),
+            _Money(v["income_cents"] - v["expense_cents"]),
+            *[v[st] for st in STATUSES],
+        ]
+        for d, v in sorted(days.items())
+    )
+
+
+TABLES = {
+    "appointments": _appointment_rows,
+    "expenses": _expense_rows,
+    "finance": _finance_rows,
+}
+
+
+def _csv_chunks(header: list[str], rows: Iterable[list[Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([cents_to_str(v) if isinstance(v, _Money) else v for v in row])
+        if buf.tell() >= CSV_FLUSH_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _xlsx_chunks(header: list[str], rows: Iterable[list[Any]]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão direto pro arquivo temporário do openpyxl, sem montar a planilha em memória
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append([from_cents(v) if isinstance(v, _Money) else v for v in row])
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+        with open(path, "rb") as f:
+            while chunk := f.read(FILE_CHUNK_BYTES):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → formato gzip
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def _stream(kind: str, fmt: str, tenant_id: int, start: datetime, end: datetime) -> Iterator[bytes]:
+    # sessão própria: a dependência get_db já foi fechada quando o corpo começa a ser enviado
+    db = ReadSessionLocal()
+    try:
+        header, rows = TABLES[kind](db, tenant_id, start, end)
+        writer = _xlsx_chunks if fmt == "xlsx" else _csv_chunks
+        yield from writer(header, rows)
+    finally:
+        db.close()
+
+
+@router.get("/{kind}")
+def export(
+    kind: ExportKind,
+    date_from: str,
+    date_to: str,
+    fmt: ExportFormat = Query(default="csv", alias="format"),
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_user),
+):
+    require_admin(current_user)
+    start, end = _parse_range(date_from, date_to)
+
+    if fmt == "xlsx":
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Exportação XLSX indisponível (openpyxl não instalado)")
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        media_type = "text/csv; charset=utf-8"
+
+    filename = f"{kind}_{date_from}_{date_to}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    body = _stream(kind, fmt, current_user.tenant_id, start, end)
+    if gzip:
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.patient import Patient
 from app.models.user import User
 from app.schemas.patient import PatientCreateIn, PatientUpdateIn, PatientOut, PatientAccessIn
-from app.deps import get_current_user, require_admin
+from app.deps import Principal, get_current_user, require_admin
 from app.core.security import hash_password
+from app.core.revocation import bump_revocation_epoch
+from app.core.response_cache import bump_generation
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
 
 
 @router.get("", response_model=list[PatientOut])
 def list_patients(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -30,7 +32,7 @@ def list_patients(
 def create_patient(
     data: PatientCreateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -87,7 +89,7 @@ def update_patient(
     patient_id: int,
     data: PatientUpdateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -112,6 +114,7 @@ def update_patient(
         setattr(p, field, value)
 
     db.commit()
+    bump_generation(db, current_user.tenant_id)  # /admin/finance/by-patient usa nome/vínculo
     db.refresh(p)
     return p
 
@@ -120,7 +123,7 @@ def update_patient(
 def remove_patient_access(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -147,9 +150,11 @@ def remove_patient_access(
         )
         if u and u.role == "patient":
             u.is_active = False
+            bump_revocation_epoch(db, current_user.tenant_id, u.id)
 
     p.user_id = None
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     return {"ok": True}
 
 
@@ -158,7 +163,7 @@ def create_or_restore_access(
     patient_id: int,
     data: PatientAccessIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -203,6 +208,8 @@ def create_or_restore_access(
         user.role = "patient"
         user.is_active = True
         user.password_hash = hash_password(data.password)
+        # senha/role mudaram: tokens antigos desse usuário não valem mais
+        bump_revocation_epoch(db, current_user.tenant_id, user.id)
     else:
         user = User(
             tenant_id=current_user.tenant_id,
@@ -216,6 +223,7 @@ def create_or_restore_access(
 
     p.user_id = user.id
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     db.refresh(p)
     return p
 
@@ -224,7 +232,7 @@ def create_or_restore_access(
 def delete_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -251,7 +259,9 @@ def delete_patient(
         )
         if u and u.role == "patient":
             u.is_active = False
+            bump_revocation_epoch(db, current_user.tenant_id, u.id)
 
     db.delete(p)
     db.commit()
+    bump_generation(db, current_user.tenant_id)
     return {"ok": True}
\ No newline at end of file
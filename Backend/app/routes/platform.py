@@ -1,29 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, engine, read_engine, async_engine, ReadSessionLocal
 from app.models.platform_admin import PlatformAdmin
 from app.models.tenant import Tenant
-from app.schemas.platform import PlatformLoginOut, TenantCreateIn, TenantOut
-from app.core.security import verify_password, create_platform_token
+from app.schemas.platform import PlatformLoginOut, TenantCreateIn, TenantOut, TenantUpdateIn
+from app.core.booking import booking_stats
+from app.core.response_cache import response_cache
+from app.core.security import verify_password_async, password_needs_rehash, create_platform_token, tenant_token_cache, platform_token_cache
+from app.core.tenant_cache import invalidate_tenant_state, tenant_state_cache, tenant_state_of
+from app.core.revocation import bump_revocation_epoch, revocations
+from app.core.kdf import kdf_pool
+from app.core.rehash import rehash_password
+from app.core.db_pool import pool_stats
+from app.core.parquet_export import export_tenant_zip
 from app.deps_platform import get_current_platform_admin
 
 router = APIRouter(prefix="/platform", tags=["Platform"])
 
+def _find_platform_admin(db: Session, email: str) -> PlatformAdmin | None:
+    return db.query(PlatformAdmin).filter(
+        PlatformAdmin.email == email,
+        PlatformAdmin.is_active == True
+    ).first()
+
 @router.post("/login", response_model=PlatformLoginOut)
-def platform_login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def platform_login(
+    background_tasks: BackgroundTasks,
+    form: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
+):
     email = form.username
     password = form.password
 
-    admin = db.query(PlatformAdmin).filter(
-        PlatformAdmin.email == email,
-        PlatformAdmin.is_active == True
-    ).first()
+    admin = await run_in_threadpool(_find_platform_admin, db, email)
 
-    if not admin or not verify_password(password, admin.password_hash):
+    if not admin or not await verify_password_async(password, admin.password_hash):
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
+    if password_needs_rehash(admin.password_hash):
+        background_tasks.add_task(rehash_password, PlatformAdmin, admin.id, admin.password_hash, password)
+
     token = create_platform_token(subject=str(admin.id))
     return {"access_token": token, "token_type": "bearer"}
 
@@ -46,11 +66,82 @@ def create_tenant(
     db.add(t)
     db.commit()
     db.refresh(t)
+    invalidate_tenant_state(t.id)
+    revocations.remember_tenant(tenant_state_of(t))
+    return t
+
+@router.patch("/tenants/{tenant_id}", response_model=TenantOut)
+def update_tenant(
+    tenant_id: int,
+    data: TenantUpdateIn,
+    db: Session = Depends(get_db),
+    _: PlatformAdmin = Depends(get_current_platform_admin),
+):
+    t = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    if not t:
+        raise HTTPException(status_code=404, detail="Tenant não encontrado")
+
+    changes = data.model_dump(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(t, field, value)
+
+    # ✅ desativação derruba os tokens já emitidos (modo stateless)
+    if changes.get("is_active") is False:
+        bump_revocation_epoch(db, t.id)
+
+    db.commit()
+    db.refresh(t)
+    # ✅ kill switch precisa valer já no próximo request
+    invalidate_tenant_state(t.id)
+    revocations.remember_tenant(tenant_state_of(t))
     return t
 
+@router.get("/tenants/{tenant_id}/export")
+def export_tenant(
+    tenant_id: int,
+    db: Session = Depends(get_db),
+    _: PlatformAdmin = Depends(get_current_platform_admin),
+):
+    # ✅ Parquet (appointments, expenses, metadados de prontuário) num zip, lido do banco em lotes
+    t = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    if not t:
+        raise HTTPException(status_code=404, detail="Tenant não encontrado")
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Exportação Parquet indisponível (pyarrow não instalado)")
+
+    def body():
+        # sessão própria: a do Depends já foi fechada quando o corpo começa a ser enviado
+        export_db = ReadSessionLocal()
+        try:
+            yield from export_tenant_zip(export_db, tenant_id)
+        finally:
+            export_db.close()
+
+    filename = f"{t.slug}_export.zip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body(), media_type="application/zip", headers=headers)
+
 @router.get("/tenants", response_model=list[TenantOut])
 def list_tenants(
     db: Session = Depends(get_db),
     _: PlatformAdmin = Depends(get_current_platform_admin),
 ):
-    return db.query(Tenant).order_by(Tenant.created_at.desc()).all()
\ No newline at end of file
+    return db.query(Tenant).order_by(Tenant.created_at.desc()).all()
+
+@router.get("/metrics")
+def metrics(_: PlatformAdmin = Depends(get_current_platform_admin)):
+    return {
+        "tenant_state_cache": tenant_state_cache.stats(),
+        "auth_revocations": revocations.stats(),
+        "tenant_token_cache": tenant_token_cache.stats(),
+        "platform_token_cache": platform_token_cache.stats(),
+        "kdf": kdf_pool.stats(),
+        "db_pool": pool_stats(engine),
+        "db_pool_replica": pool_stats(read_engine) if read_engine is not engine else None,
+        "db_pool_async": pool_stats(async_engine),
+        "response_cache": response_cache.stats(),
+        "booking": booking_stats.stats(),
+    }
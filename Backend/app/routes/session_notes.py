@@ -8,16 +8,15 @@ from sqlalchemy.orm import Session
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.session_note import SessionNote
 from app.models.patient import Patient
-from app.models.user import User
 from app.schemas.session_note import (
     SessionNoteCreateIn,
     SessionNoteUpdateIn,
     SessionNoteOut,
 )
-from app.deps import get_current_user, require_admin
+from app.deps import Principal, get_current_user, require_admin
 
 router = APIRouter(prefix="/session-notes", tags=["Session Notes"])
 
@@ -56,7 +55,7 @@ def _normalize_session_date(value):
 def create_note(
     data: SessionNoteCreateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -96,7 +95,7 @@ def update_note(
     note_id: int,
     data: SessionNoteUpdateIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -134,8 +133,8 @@ def update_note(
 def list_by_patient_month(
     patient_id: int,
     month: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
@@ -218,7 +217,7 @@ def _pdf_for_note(note: SessionNote, patient_name: str) -> bytes:
 def download_pdf(
     note_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     require_admin(current_user)
 
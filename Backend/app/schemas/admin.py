@@ -12,8 +12,19 @@ class FinanceSummaryOut(BaseModel):
     # contagens por status
     status_counts: dict[str, int]
 
-    # série diária (somente no modo mês)
+    # série de receita: um ponto por dia/semana/mês ("day" = início do bucket)
     daily_income: list[dict[str, Any]]
+    granularity: str = "day"
+
+
+class FinanceSeriesOut(BaseModel):
+    # layout colunar: o i-ésimo item de cada lista corresponde a periods[i] (início do período)
+    granularity: str
+    periods: list[str]
+    income: list[float]
+    expense: list[float]
+    cash: list[float]
+    status_counts: dict[str, list[int]]
 
 
 class ExpenseIn(BaseModel):
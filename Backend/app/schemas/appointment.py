@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from datetime import datetime
 
@@ -34,8 +34,17 @@ class SetStatusIn(BaseModel):
     status: AppointmentStatus  # admin: done | no_show | canceled (e booked/available se quiser)
 
 
+class SetStatusBatchIn(BaseModel):
+    items: list[SetStatusIn] = Field(min_length=1, max_length=200)
+
+
+class CancelBatchIn(BaseModel):
+    appointment_ids: list[int] = Field(min_length=1, max_length=200)
+
+
 class BulkGenerateIn(BaseModel):
     date: str  # YYYY-MM-DD
+    date_to: Optional[str] = None  # YYYY-MM-DD (inclusivo): repete a mesma janela em cada dia
     start_time: str  # HH:MM
     end_time: str  # HH:MM
     duration_minutes: int
@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime, time
+
+
+class AvailabilityTemplateIn(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = segunda ... 6 = domingo
+    start_time: time  # HH:MM
+    end_time: time  # HH:MM
+    duration_minutes: int = Field(gt=0)
+    price: float
+    is_active: bool = True
+
+
+class AvailabilityTemplateUpdateIn(BaseModel):
+    weekday: Optional[int] = Field(default=None, ge=0, le=6)
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    duration_minutes: Optional[int] = Field(default=None, gt=0)
+    price: Optional[float] = None
+    is_active: Optional[bool] = None
+
+
+class AvailabilityTemplateOut(BaseModel):
+    id: int
+    weekday: int
+    start_time: time
+    end_time: time
+    duration_minutes: int
+    price: float
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MaterializeIn(BaseModel):
+    date_from: str  # YYYY-MM-DD
+    date_to: str  # YYYY-MM-DD (inclusivo)
+
+
+class MaterializeOut(BaseModel):
+    created: int
+    skipped: int
@@ -1,3 +1,6 @@
+from datetime import date
+from typing import Optional
+
 from pydantic import BaseModel
 
 class StatusCount(BaseModel):
@@ -9,6 +12,12 @@ class PatientTotal(BaseModel):
     patient_name: str
     total: float
 
+    # comparecimento (só preenchido pelo /admin/finance/by-patient)
+    done_count: int = 0
+    no_show_count: int = 0
+    canceled_count: int = 0
+    last_visit: Optional[date] = None
+
 class FinanceSummaryOut(BaseModel):
     month: str  # YYYY-MM
     total_month: float
@@ -0,0 +1,206 @@
+"""Semeia tenants grandes e mostra o plano das queries quentes sem e com os índices compostos.
+
+ATENÇÃO: escreve no banco de DATABASE_URL e derruba/recria os índices compostos.
+Use um banco descartável.
+
+Uso (a partir de Backend/):
+    DATABASE_URL=sqlite:///./bench.db SECRET_KEY=x python -m app.scripts.bench_indexes --slots 200000
+    DATABASE_URL=postgresql://.../bench SECRET_KEY=x python -m app.scripts.bench_indexes --tenants 5
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+from app.database import Base, engine
+from app.migrations import _composite_indexes
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.patient import Patient
+from app.models.session_note import SessionNote
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.models import auth_revocation, platform_admin  # noqa: F401  (create_all)
+
+CHUNK = 5000
+STATUSES = ["available"] * 6 + ["booked", "done", "done", "canceled", "no_show"]
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK):
+        yield rows[i:i + CHUNK]
+
+
+def seed(tenants: int, slots: int, patients: int, expenses: int, notes: int) -> int:
+    rnd = random.Random(42)
+    base = datetime(2024, 1, 1, 8, 0)
+    target_tenant = None
+
+    with engine.begin() as conn:
+        for n in range(tenants):
+            slug = f"bench-{n}-{int(time.time())}"
+            tenant_id = conn.execute(
+                insert(Tenant).values(name=slug, slug=slug, is_active=True, created_at=datetime.utcnow())
+            ).inserted_primary_key[0]
+            target_tenant = target_tenant or tenant_id
+
+            user_rows = [
+                {"tenant_id": tenant_id, "email": f"p{i}@{slug}", "password_hash": "x", "role": "patient", "is_active": True}
+                for i in range(patients)
+            ]
+            for chunk in _chunks(user_rows):
+                conn.execute(insert(User), chunk)
+            user_ids = conn.execute(select(User.id).where(User.tenant_id == tenant_id)).scalars().all()
+
+            for chunk in _chunks([
+                {"tenant_id": tenant_id, "full_name": f"Paciente {uid}", "user_id": uid}
+                for uid in user_ids
+            ]):
+                conn.execute(insert(Patient), chunk)
+            patient_ids = conn.execute(select(Patient.id).where(Patient.tenant_id == tenant_id)).scalars().all()
+
+            appt_rows = []
+            for i in range(slots):
+                start = base + timedelta(minutes=20 * i)
+                status = rnd.choice(STATUSES)
+                appt_rows.append({
+                    "tenant_id": tenant_id,
+                    "start_at": start,
+                    "end_at": start + timedelta(minutes=20),
+                    "status": status,
+                    "price_cents": 15000,
+                    "patient_user_id": None if status == "available" else rnd.choice(user_ids),
+                })
+            for chunk in _chunks(appt_rows):
+                conn.execute(insert(Appointment), chunk)
+
+            for chunk in _chunks([
+                {
+                    "tenant_id": tenant_id,
+                    "title": f"Despesa {i}",
+                    "amount_cents": 1000 + (i % 90) * 100,
+                    "spent_at": base + timedelta(hours=7 * i),
+                }
+                for i in range(expenses)
+            ]):
+                conn.execute(insert(Expense), chunk)
+
+            for chunk in _chunks([
+                {
+                    "tenant_id": tenant_id,
+                    "patient_id": rnd.choice(patient_ids),
+                    "content": None,
+                    "is_locked": False,
+                    "session_date": date(2024, 1, 1) + timedelta(days=i % 700),
+                    "created_at": datetime.utcnow(),
+                    "updated_at": datetime.utcnow(),
+                }
+                for i in range(notes)
+            ]):
+                conn.execute(insert(SessionNote), chunk)
+
+    return target_tenant
+
+
+def _hot_queries(tenant_id: int, conn) -> dict[str, object]:
+    patient_user_id = conn.execute(
+        select(Patient.user_id).where(Patient.tenant_id == tenant_id).limit(1)
+    ).scalar()
+    patient_id = conn.execute(
+        select(SessionNote.patient_id).where(SessionNote.tenant_id == tenant_id).limit(1)
+    ).scalar()
+    month_start, month_end = datetime(2024, 6, 1), datetime(2024, 7, 1)
+
+    return {
+        "/appointments/available": select(Appointment.id)
+        .where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.status == "available",
+            Appointment.start_at >= datetime(2025, 1, 1),
+        )
+        .order_by(Appointment.start_at),
+        "finance_summary (done)": select(Appointment.price_cents).where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.status == "done",
+            Appointment.start_at >= month_start,
+            Appointment.start_at < month_end,
+        ),
+        "/appointments/mine": select(Appointment.id)
+        .where(Appointment.tenant_id == tenant_id, Appointment.patient_user_id == patient_user_id)
+        .order_by(Appointment.start_at.desc()),
+        "list_by_patient_month": select(SessionNote.id).where(
+            SessionNote.tenant_id == tenant_id,
+            SessionNote.patient_id == patient_id,
+            SessionNote.session_date >= month_start.date(),
+            SessionNote.session_date < month_end.date(),
+        ),
+        "/admin/expenses": select(Expense.id)
+        .where(Expense.tenant_id == tenant_id, Expense.spent_at >= month_start, Expense.spent_at < month_end)
+        .order_by(Expense.spent_at.desc()),
+        "patients por user_id": select(Patient.id).where(
+            Patient.tenant_id == tenant_id, Patient.user_id == patient_user_id
+        ),
+    }
+
+
+def _explain(conn, stmt) -> tuple[str, float]:
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    plan = "\n".join(" | ".join(str(c) for c in row) for row in conn.execute(text(prefix + sql)))
+
+    t0 = time.perf_counter()
+    conn.execute(stmt).fetchall()
+    return plan, (time.perf_counter() - t0) * 1000
+
+
+def _report(label: str, tenant_id: int) -> dict[str, float]:
+    timings = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+        print(f"\n===== {label} =====")
+        for name, stmt in _hot_queries(tenant_id, conn).items():
+            plan, ms = _explain(conn, stmt)
+            timings[name] = ms
+            print(f"\n-- {name} ({ms:.1f} ms)\n{plan}")
+    return timings
+
+
+def _drop_composite_indexes() -> None:
+    with engine.begin() as conn:
+        for model in (Appointment, Expense, Patient, SessionNote):
+            for index in model.__table__.indexes:
+                if len(index.columns) > 1:
+                    index.drop(bind=conn, checkfirst=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=100000, help="appointments por tenant")
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--expenses", type=int, default=5000)
+    parser.add_argument("--notes", type=int, default=20000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    t0 = time.perf_counter()
+    tenant_id = seed(args.tenants, args.slots, args.patients, args.expenses, args.notes)
+    print(f"seed: {args.tenants} tenants x {args.slots} appointments em {time.perf_counter() - t0:.1f}s")
+
+    _drop_composite_indexes()
+    before = _report("ANTES (só índices de coluna única)", tenant_id)
+
+    with engine.begin() as conn:
+        _composite_indexes(conn)
+    after = _report("DEPOIS (índices compostos/parciais)", tenant_id)
+
+    print("\n===== resumo =====")
+    for name in before:
+        print(f"{name:<28}{before[name]:>10.1f} ms{after[name]:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
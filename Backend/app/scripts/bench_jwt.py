@@ -0,0 +1,50 @@
+"""Micro-benchmark: custo por request do decode do JWT, com e sem o cache.
+
+Uso (a partir de Backend/):
+    python -m app.scripts.bench_jwt --n 20000
+"""
+import argparse
+import os
+import time
+
+# só precisa de config mínima para importar o app.settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.core.security import (  # noqa: E402
+    create_access_token,
+    decode_tenant_token,
+    tenant_token_cache,
+    _decode_tenant_token_uncached,
+)
+
+
+def _run(fn, token: str, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(token)
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token(subject="1", tenant_id=1, role="admin")
+
+    uncached = _run(_decode_tenant_token_uncached, token, args.n)
+
+    tenant_token_cache.clear()
+    decode_tenant_token(token)  # aquece
+    cached = _run(decode_tenant_token, token, args.n)
+
+    print(f"requests:          {args.n}")
+    print(f"sem cache:         {uncached * 1e6:9.2f} µs/decode")
+    print(f"com cache:         {cached * 1e6:9.2f} µs/decode")
+    print(f"ganho:             {uncached / cached:9.1f}x")
+    print(f"cache:             {tenant_token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Mede hashes/s do Argon2 por perfil de custo nesta máquina.
+
+Ajuda a dimensionar a capacidade de login (KDF_WORKERS x hashes/s por thread).
+
+Uso (a partir de Backend/):
+    python -m app.scripts.bench_kdf --seconds 3
+    python -m app.scripts.bench_kdf --profile low --threads 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from app.core.security import ARGON2_PROFILES, build_crypt_context  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+def _hashes_per_second(ctx, seconds: float, threads: int) -> tuple[float, float]:
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> tuple[int, float]:
+        n, spent = 0, 0.0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            ctx.hash("benchmark-password")
+            spent += time.perf_counter() - t0
+            n += 1
+        return n, spent
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: worker(), range(threads)))
+    elapsed = time.perf_counter() - t0
+
+    total = sum(n for n, _ in results)
+    avg_ms = sum(spent for _, spent in results) / total * 1000 if total else 0.0
+    return total / elapsed, avg_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=settings.KDF_WORKERS)
+    parser.add_argument("--profile", choices=sorted(ARGON2_PROFILES), default=None)
+    args = parser.parse_args()
+
+    profiles = [args.profile] if args.profile else list(ARGON2_PROFILES)
+
+    print(f"{'perfil':<10}{'memória':>10}{'t':>4}{'p':>4}{'threads':>9}{'hash/s':>10}{'ms/hash':>10}")
+    for name in profiles:
+        params = ARGON2_PROFILES[name]
+        ctx = build_crypt_context(params)
+        rate, avg_ms = _hashes_per_second(ctx, args.seconds, args.threads)
+        print(
+            f"{name:<10}{params['memory_cost'] // 1024:>7} MiB"
+            f"{params['time_cost']:>4}{params['parallelism']:>4}"
+            f"{args.threads:>9}{rate:>10.1f}{avg_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
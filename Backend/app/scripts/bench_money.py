@@ -0,0 +1,168 @@
+"""Compara o finance_summary antigo (float hidratado no ORM + sum em Python) com o atual
+(centavos inteiros somados no banco) num tenant sintético grande.
+
+ATENÇÃO: escreve no banco de DATABASE_URL. Use um banco descartável.
+
+Uso (a partir de Backend/):
+    DATABASE_URL=sqlite:///./bench.db SECRET_KEY=x python -m app.scripts.bench_money
+    DATABASE_URL=sqlite:///./bench.db SECRET_KEY=x python -m app.scripts.bench_money --rows 200000 --reuse
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app.core.money import from_cents
+from app.database import Base, SessionLocal, engine
+from app.models.appointment import Appointment
+from app.models.expense import Expense
+from app.models.tenant import Tenant
+from app.models import user, patient, session_note, platform_admin, auth_revocation, finance_rollup  # noqa: F401
+from app.routes.admin import _totals_from_tables
+
+CHUNK = 10000
+STATUSES = ["available"] * 3 + ["booked", "done", "done", "done", "canceled", "no_show"]
+# preços "de verdade", com centavos que não são exatos em binário
+PRICES_CENTS = [8990, 14990, 15050, 19999, 25010, 33333]
+SLUG = "bench-money"
+
+
+def seed(rows: int) -> int:
+    rnd = random.Random(7)
+    base = datetime(2024, 1, 1, 7, 0)
+
+    with engine.begin() as conn:
+        tenant_id = conn.execute(
+            insert(Tenant).values(name=SLUG, slug=f"{SLUG}-{int(time.time())}", is_active=True, created_at=datetime.utcnow())
+        ).inserted_primary_key[0]
+
+        batch = []
+        for i in range(rows):
+            start = base + timedelta(minutes=15 * i)
+            batch.append({
+                "tenant_id": tenant_id,
+                "start_at": start,
+                "end_at": start + timedelta(minutes=15),
+                "status": rnd.choice(STATUSES),
+                "price_cents": rnd.choice(PRICES_CENTS),
+                "patient_user_id": None,
+            })
+            if len(batch) == CHUNK:
+                conn.execute(insert(Appointment), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Appointment), batch)
+
+        conn.execute(insert(Expense), [
+            {
+                "tenant_id": tenant_id,
+                "title": f"Despesa {i}",
+                "amount_cents": 1010 + (i % 97) * 33,
+                "spent_at": base + timedelta(hours=3 * i),
+            }
+            for i in range(rows // 20)
+        ])
+    return tenant_id
+
+
+def _timed(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, ms, peak / 1024 / 1024
+
+
+def summary_old(db, tenant_id, start, end) -> tuple[float, float]:
+    # como era: hidrata os objetos e soma float (reais) em Python
+    done = (
+        db.query(Appointment)
+        .filter(
+            Appointment.tenant_id == tenant_id,
+            Appointment.status == "done",
+            Appointment.start_at >= start,
+            Appointment.start_at < end,
+        )
+        .all()
+    )
+    income = float(sum((a.price or 0) for a in done))
+    expenses = (
+        db.query(Expense)
+        .filter(Expense.tenant_id == tenant_id, Expense.spent_at >= start, Expense.spent_at < end)
+        .all()
+    )
+    expense_total = float(sum((e.amount or 0) for e in expenses))
+    return income, expense_total
+
+
+def summary_sql(db, tenant_id, start, end) -> tuple[int, int]:
+    income, expense_total, _, _ = _totals_from_tables(db, tenant_id, start, end)
+    return income, expense_total
+
+
+def summary_numpy(db, tenant_id, start, end):
+    import numpy as np
+
+    cents = db.execute(
+        select(Appointment.price_cents).where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.status == "done",
+            Appointment.start_at >= start,
+            Appointment.start_at < end,
+        )
+    ).scalars()
+    arr = np.fromiter(cents, dtype=np.int64)
+    return int(arr.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="appointments no tenant sintético")
+    parser.add_argument("--reuse", action="store_true", help="reaproveita o último tenant semeado")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        tenant_id = None
+        if args.reuse:
+            tenant_id = db.execute(
+                select(Tenant.id).where(Tenant.name == SLUG).order_by(Tenant.id.desc())
+            ).scalar()
+        if tenant_id is None:
+            t0 = time.perf_counter()
+            tenant_id = seed(args.rows)
+            print(f"seed: {args.rows} appointments em {time.perf_counter() - t0:.1f}s")
+
+        start, end = datetime(2000, 1, 1), datetime(2100, 1, 1)
+
+        (old_income, old_expense), old_ms, old_mb = _timed(lambda: summary_old(db, tenant_id, start, end))
+        db.expunge_all()
+        (income, expense), new_ms, new_mb = _timed(lambda: summary_sql(db, tenant_id, start, end))
+
+        print(f"\n{'':<28}{'tempo':>12}{'pico mem':>12}{'receita':>20}{'despesas':>20}")
+        print(f"{'antes (float + ORM)':<28}{old_ms:>10.1f}ms{old_mb:>10.1f}MB{old_income:>20.6f}{old_expense:>20.6f}")
+        print(f"{'agora (SUM centavos)':<28}{new_ms:>10.1f}ms{new_mb:>10.1f}MB{from_cents(income):>20.2f}{from_cents(expense):>20.2f}")
+
+        try:
+            np_income, np_ms, np_mb = _timed(lambda: summary_numpy(db, tenant_id, start, end))
+        except ImportError:
+            print("(numpy não instalado: pulando a soma vetorizada)")
+        else:
+            print(f"{'numpy int64 (receita)':<28}{np_ms:>10.1f}ms{np_mb:>10.1f}MB{from_cents(np_income):>20.2f}")
+            assert np_income == income
+
+        drift = old_income - income / 100
+        print(f"\ndrift do float na receita: {drift:+.10f} (antes do round)")
+        print(f"round(float, 2) == exato? {round(old_income, 2) == from_cents(income)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Load test simples das leituras da agenda: modo sync x modo async (DB_ASYNC).
+
+Com --compare o script sobe o uvicorn duas vezes (DB_ASYNC=false e true) contra o
+mesmo DATABASE_URL e roda a mesma carga nos dois. Sem --compare, mede um servidor
+já rodando em --base-url.
+
+Uso (a partir de Backend/, com DATABASE_URL/SECRET_KEY no ambiente):
+    python -m app.scripts.loadtest --compare --concurrency 64 --requests 5000
+    python -m app.scripts.loadtest --base-url http://localhost:8000 --path /appointments/range?date_from=2025-01-01&date_to=2025-01-31
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _request(url: str, *, data: dict | None = None, headers: dict | None = None) -> tuple[int, bytes]:
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers=headers or {})
+    if body is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _login(base_url: str, slug: str, email: str, password: str) -> str:
+    status, body = _request(
+        f"{base_url}/auth/login-tenant",
+        data={"tenant_slug": slug, "email": email, "password": password},
+    )
+    if status != 200:
+        raise SystemExit(f"login falhou ({status}): {body[:200]!r}")
+    return json.loads(body)["access_token"]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def run_load(base_url: str, path: str, token: str, slug: str, concurrency: int, total: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}", "X-Tenant-Slug": slug}
+    url = base_url + path
+
+    def one(_):
+        t0 = time.perf_counter()
+        status, _ = _request(url, headers=headers)
+        return status, time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - t0
+
+    latencies = [lat for _, lat in results]
+    errors = sum(1 for status, _ in results if status != 200)
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _wait_health(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if _request(f"{base_url}/health")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise SystemExit("servidor não respondeu /health")
+
+
+def _serve(db_async: bool, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if db_async else "false")
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/appointments/available")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--slug", default=os.getenv("DEFAULT_TENANT_SLUG", "demo"))
+    parser.add_argument("--email", default=os.getenv("DEFAULT_ADMIN_EMAIL", "admin@teste.com"))
+    parser.add_argument("--password", default=os.getenv("DEFAULT_ADMIN_PASSWORD", "123456"))
+    parser.add_argument("--compare", action="store_true", help="sobe o uvicorn em modo sync e async e compara")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if not args.compare:
+        token = _login(args.base_url, args.slug, args.email, args.password)
+        print(run_load(args.base_url, args.path, token, args.slug, args.concurrency, args.requests))
+        return
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    for label, db_async in (("sync", False), ("async", True)):
+        proc = _serve(db_async, args.port, args.workers)
+        try:
+            _wait_health(base_url)
+            token = _login(base_url, args.slug, args.email, args.password)
+            run_load(base_url, args.path, token, args.slug, args.concurrency, min(200, args.requests))  # aquece
+            result = run_load(base_url, args.path, token, args.slug, args.concurrency, args.requests)
+            print(f"{label:<6} {result}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
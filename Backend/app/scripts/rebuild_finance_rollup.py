@@ -0,0 +1,36 @@
+"""Recalcula o finance_daily_rollup a partir de appointments/expenses (corrige drift).
+
+Uso (a partir de Backend/):
+    python -m app.scripts.rebuild_finance_rollup             # todos os tenants
+    python -m app.scripts.rebuild_finance_rollup --tenant 3
+"""
+import argparse
+
+from app.core.finance_rollup import rebuild_rollup
+from app.database import Base, SessionLocal, engine
+from app.models import (  # noqa: F401  (registra todos os models/relationships)
+    user, tenant, patient, appointment, session_note, expense, platform_admin, auth_revocation,
+    finance_rollup,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenant", type=int, default=None)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[finance_rollup.FinanceDailyRollup.__table__])
+
+    db = SessionLocal()
+    try:
+        n = rebuild_rollup(db, args.tenant)
+        db.commit()
+    finally:
+        db.close()
+
+    alvo = f"tenant {args.tenant}" if args.tenant is not None else "todos os tenants"
+    print(f"✅ rollup reconstruído ({alvo}): {n} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Abre a agenda dos templates de disponibilidade até hoje + N dias (idempotente).
+
+Pensado para cron/agendador (uma execução por vez). Com um só worker dá para usar
+AVAILABILITY_HORIZON_DAYS no lugar, que roda o mesmo job dentro da API.
+
+Uso (a partir de Backend/):
+    python -m app.scripts.roll_availability --days 90
+"""
+import argparse
+
+from app.core.availability import roll_forward
+from app.models import (  # noqa: F401  (registra todos os models/relationships)
+    user, tenant, patient, appointment, session_note, expense, platform_admin, auth_revocation,
+    finance_rollup, availability_template,
+)
+from app.settings import settings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.AVAILABILITY_HORIZON_DAYS or 90)
+    args = parser.parse_args()
+
+    created = roll_forward(args.days)
+    total = sum(created.values())
+    print(f"✅ horizonte de {args.days} dias: {total} horários criados em {len(created)} tenants")
+
+
+if __name__ == "__main__":
+    main()
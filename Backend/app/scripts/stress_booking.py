@@ -0,0 +1,139 @@
+"""Martela um único horário com muitas threads e mede conflitos x sucessos e latência.
+
+Cada rodada reabre o slot e solta todas as threads juntas (barreira). O esperado com o
+UPDATE condicional é exatamente 1 sucesso por rodada; --legacy roda o fluxo antigo
+(SELECT + checagem em Python + commit) para comparar, onde podem sair reservas duplas.
+
+ATENÇÃO: escreve no banco de DATABASE_URL. Use um banco descartável (de preferência Postgres:
+no SQLite as escritas já são serializadas pelo lock do arquivo).
+
+Uso (a partir de Backend/):
+    DATABASE_URL=postgresql://.../bench SECRET_KEY=x python -m app.scripts.stress_booking --threads 32 --rounds 50
+    DATABASE_URL=sqlite:///./bench.db SECRET_KEY=x python -m app.scripts.stress_booking --legacy
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import insert, update
+
+from app.core.booking import book_slot, booking_stats
+from app.database import Base, SessionLocal, engine
+from app.models.appointment import Appointment
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.models import (  # noqa: F401  (registra todos os models/relationships)
+    patient, session_note, expense, platform_admin, auth_revocation, finance_rollup, availability_template,
+)
+
+
+def seed(threads: int) -> tuple[int, int, list[int]]:
+    slug = f"stress-{int(time.time())}"
+    with engine.begin() as conn:
+        tenant_id = conn.execute(
+            insert(Tenant).values(name=slug, slug=slug, is_active=True, created_at=datetime.utcnow())
+        ).inserted_primary_key[0]
+        user_ids = [
+            conn.execute(
+                insert(User).values(
+                    tenant_id=tenant_id, email=f"p{i}@{slug}", password_hash="x", role="patient", is_active=True
+                )
+            ).inserted_primary_key[0]
+            for i in range(threads)
+        ]
+        start = datetime.utcnow() + timedelta(days=30)
+        slot_id = conn.execute(
+            insert(Appointment).values(
+                tenant_id=tenant_id,
+                start_at=start,
+                end_at=start + timedelta(minutes=50),
+                status="available",
+                price_cents=15000,
+            )
+        ).inserted_primary_key[0]
+    return tenant_id, slot_id, user_ids
+
+
+def legacy_book(db, tenant_id: int, slot_id: int, user_id: int) -> None:
+    # fluxo antigo do /book: lê, confere em Python, grava
+    appt = db.query(Appointment).filter(Appointment.id == slot_id, Appointment.tenant_id == tenant_id).first()
+    if appt.status != "available":
+        raise HTTPException(status_code=400, detail="Horário indisponível")
+    appt.status = "booked"
+    appt.patient_user_id = user_id
+    db.commit()
+
+
+def attempt(fn, barrier: threading.Barrier, tenant_id: int, slot_id: int, user_id: int) -> tuple[str, float]:
+    db = SessionLocal()
+    try:
+        barrier.wait()
+        t0 = time.perf_counter()
+        try:
+            fn(db, tenant_id, slot_id, user_id)
+            outcome = "ok"
+        except HTTPException:
+            outcome = "conflict"
+        except Exception:
+            db.rollback()
+            outcome = "error"
+        return outcome, time.perf_counter() - t0
+    finally:
+        db.close()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--legacy", action="store_true", help="usa o SELECT + checagem + commit antigo")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    tenant_id, slot_id, user_ids = seed(args.threads)
+    fn = legacy_book if args.legacy else book_slot
+
+    totals = {"ok": 0, "conflict": 0, "error": 0}
+    latencies: list[float] = []
+    double_booked_rounds = 0
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for _ in range(args.rounds):
+            with engine.begin() as conn:
+                conn.execute(
+                    update(Appointment)
+                    .where(Appointment.id == slot_id)
+                    .values(status="available", patient_user_id=None)
+                )
+            barrier = threading.Barrier(args.threads)
+            results = list(pool.map(lambda uid: attempt(fn, barrier, tenant_id, slot_id, uid), user_ids))
+
+            oks = 0
+            for outcome, seconds in results:
+                totals[outcome] += 1
+                latencies.append(seconds)
+                oks += outcome == "ok"
+            double_booked_rounds += oks > 1
+
+    modo = "legado (SELECT + commit)" if args.legacy else "UPDATE condicional"
+    print(f"\n===== {modo}: {args.threads} threads x {args.rounds} rodadas ({engine.dialect.name}) =====")
+    print(f"sucessos:   {totals['ok']}  (esperado: {args.rounds})")
+    print(f"conflitos:  {totals['conflict']}")
+    print(f"erros:      {totals['error']}")
+    print(f"rodadas com mais de 1 \"sucesso\": {double_booked_rounds}")
+    print(f"latência:   p50 {_percentile(latencies, 0.50) * 1000:.1f} ms | "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms | max {max(latencies) * 1000:.1f} ms")
+    if not args.legacy:
+        print("booking_stats:", booking_stats.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,68 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
 
+    # réplica só-leitura (opcional). Sem ela, as rotas de leitura usam o primário.
+    DATABASE_REPLICA_URL: str | None = None
+
+    # cache do estado do tenant (kill switch/licença) usado no get_current_user
+    TENANT_CACHE_TTL_SECONDS: float = 30.0
+    TENANT_CACHE_MAX_ENTRIES: int = 1024
+
+    # modo stateless: autoriza pelas claims do JWT + epoch de revogação em memória (sem SELECT por request)
+    AUTH_STATELESS: bool = False
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 5.0
+
+    # cache de JWT já verificado (chave = sha256 do token; nunca passa do exp)
+    JWT_CACHE_TTL_SECONDS: float = 300.0
+    JWT_CACHE_MAX_ENTRIES: int = 4096
+
+    # pool do Argon2: threads dedicadas + limite de fila (acima disso responde 503)
+    KDF_WORKERS: int = 2
+    KDF_MAX_PENDING: int = 32
+
+    # custo do Argon2: low | default | high (ver app.core.security.ARGON2_PROFILES) + ajuste fino opcional
+    ARGON2_PROFILE: str = "default"
+    ARGON2_MEMORY_COST: int | None = None
+    ARGON2_TIME_COST: int | None = None
+    ARGON2_PARALLELISM: int | None = None
+
+    # rotas de leitura da agenda em modo async (engine async do SQLAlchemy)
+    DB_ASYNC: bool = False
+
+    # pool de conexões (por worker do uvicorn: total = workers x (size + overflow))
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # com pre-ping desligado: valida só conexões ociosas há mais de N segundos (0 = não valida)
+    DB_POOL_VALIDATE_INTERVAL: float = 0.0
+
+    # roda também as migrações destrutivas (app.migrations.CONTRACT_MIGRATIONS) no startup;
+    # ligar só no deploy seguinte ao que trouxe a migração (no SQLite local rodam sempre)
+    MIGRATIONS_CONTRACT: bool = False
+
+    # /admin/finance/summary lê do finance_daily_rollup (rodar app.scripts.rebuild_finance_rollup antes de ligar)
+    FINANCE_ROLLUP_ENABLED: bool = False
+
+    # cache de resposta do financeiro (summary/expenses), invalidado por geração a cada escrita
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    # por quanto tempo cada worker confia na última geração lida (escrita em outro worker
+    # aparece depois de no máximo isso; no próprio worker, na hora)
+    RESPONSE_CACHE_GENERATION_TTL_SECONDS: float = 1.0
+
+    # job de horizonte: mantém a agenda dos templates aberta até hoje + N dias (0 = desligado;
+    # com vários workers prefira rodar app.scripts.roll_availability via cron)
+    AVAILABILITY_HORIZON_DAYS: int = 0
+    AVAILABILITY_HORIZON_INTERVAL_SECONDS: float = 3600.0
+
+    # materialized: cada horário livre é uma linha "available" | virtual: livres saem dos templates
+    # na leitura e só consultas marcadas/bloqueadas viram linha (ver app.core.availability)
+    AVAILABILITY_MODE: str = "materialized"
+    # até quantos dias à frente o /appointments/available mostra slots virtuais
+    AVAILABILITY_VIRTUAL_DAYS: int = 60
+
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         url = self.DATABASE_URL.strip()
@@ -14,4 +76,13 @@ class Settings(BaseSettings):
             url = url.replace("postgres://", "postgresql://", 1)
         return url
 
+    @property
+    def SQLALCHEMY_REPLICA_URI(self) -> str | None:
+        if not self.DATABASE_REPLICA_URL:
+            return None
+        url = self.DATABASE_REPLICA_URL.strip()
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        return url
+
 settings = Settings()
\ No newline at end of file